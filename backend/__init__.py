@@ -1,33 +1,101 @@
+import os
+from importlib import import_module
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
 from .config import get_config
+from .utils.replicas import RoutingSession, replica_binds
 
 # Global db instance
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# name -> (module, attribute, url prefix); modules are imported only for the
+# blueprints an app serves (APP_BLUEPRINTS)
+BLUEPRINTS = {
+    "auth": ("backend.routes.auth_routes", "auth_bp", "/api/auth"),
+    "users": ("backend.routes.user_routes", "user_bp", "/api/users"),
+    "equipments": ("backend.routes.equipment_routes", "equipment_bp", "/api/equipments"),
+    "loans": ("backend.routes.loan_routes", "loan_bp", "/api/loans"),
+    "alerts": ("backend.routes.alert_routes", "alerts_bp", "/api/alerts"),
+    "stats": ("backend.routes.stats_routes", "stats_bp", "/api/stats"),
+    "metrics": ("backend.routes.metrics_routes", "metrics_bp", "/api/metrics"),
+    "search": ("backend.routes.search_routes", "search_bp", "/api/search"),
+    "events": ("backend.routes.event_routes", "events_bp", "/api/events"),
+    "reports": ("backend.routes.report_routes", "reports_bp", "/api/reports"),
+}
+
+
+def selected_blueprints(value) -> list:
+    """Names from ``APP_BLUEPRINTS``: "all", "none", or a comma-separated list."""
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value == "all":
+            return list(BLUEPRINTS)
+        value = [] if value in ("", "none") else [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(value) - set(BLUEPRINTS))
+    if unknown:
+        raise ValueError(f"Unknown APP_BLUEPRINTS: {', '.join(unknown)}")
+    return list(value)
+
+
+def init_migrations(app):
+    """Register Flask-Migrate (``flask db``). Only the CLI entry point needs it, and it imports Alembic."""
+    from flask_migrate import Migrate
 
+    Migrate(app, db, directory=MIGRATIONS_DIR)
 
-def create_app(config_name: str = None):
+
+def create_app(config_name: str = None, config_overrides: dict = None):
     app = Flask(__name__)
     app.config.from_object(get_config(config_name))
+    if config_overrides:
+        app.config.update(config_overrides)
+    app.config["SQLALCHEMY_BINDS"] = {
+        **app.config.get("SQLALCHEMY_BINDS", {}),
+        **replica_binds(app.config.get("READ_REPLICA_URIS", [])),
+    }
+    blueprints = selected_blueprints(app.config.get("APP_BLUEPRINTS", "all"))
 
     # Initialize extensions
     db.init_app(app)
-    CORS(app, resources={r"/api/*": {"origins": app.config.get("CORS_ORIGINS", "*")}})
+    # every table, and the listeners that keep table_versions and the search
+    # index in sync, whether or not any route module is loaded
+    from . import models  # noqa: F401
+    from .utils import search  # noqa: F401
+
+    from .utils.startup import check_pool_capacity, check_production_settings
+
+    with app.app_context():
+        # the primary and any read replicas
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                from .utils.transactions import enable_sqlite_transactions
+
+                enable_sqlite_transactions(engine)
+            check_pool_capacity(app, engine)
+    check_production_settings(app)
+
+    # HTTP-only setup; CLI jobs and workers (APP_BLUEPRINTS=none) skip it
+    if blueprints:
+        from flask_cors import CORS
+        from .utils.metrics import init_metrics
+        from .utils.compression import init_compression
+
+        init_metrics(app)
+        init_compression(app)
+        CORS(app, resources={r"/api/*": {"origins": app.config.get("CORS_ORIGINS", "*")}})
+    if "events" in blueprints:
+        from .utils.events import init_events
+
+        init_events(app)
 
     # Register blueprints
-    from .routes.auth_routes import auth_bp
-    from .routes.user_routes import user_bp
-    from .routes.equipment_routes import equipment_bp
-    from .routes.loan_routes import loan_bp
-    from .routes.alert_routes import alerts_bp
-
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(user_bp, url_prefix="/api/users")
-    app.register_blueprint(equipment_bp, url_prefix="/api/equipments")
-    app.register_blueprint(loan_bp, url_prefix="/api/loans")
-    app.register_blueprint(alerts_bp, url_prefix="/api/alerts")
+    for name in blueprints:
+        module, attribute, url_prefix = BLUEPRINTS[name]
+        app.register_blueprint(getattr(import_module(module), attribute), url_prefix=url_prefix)
 
     @app.route("/api/health", methods=["GET"])
     def health_check():
@@ -1,21 +1,120 @@
-from backend import create_app, db
-from backend.models import user, equipment, loan, alert  # noqa: F401
+import sys
+import time
+
+import click
+
+from backend import create_app, db, init_migrations
 
 app = create_app()
+init_migrations(app)
 
 
 @app.cli.command("create-db")
 def create_db():
-    """Create database tables."""
+    """Create/upgrade database tables (alias for `flask db upgrade`)."""
+    from flask_migrate import upgrade
+
     with app.app_context():
-        db.create_all()
+        upgrade()
         print("Database tables created.")
 
 
-if __name__ == "__main__":
-    print("\n=== Registered Routes ===")
-    for rule in app.url_map.iter_rules():
-        print(rule)
-    print("=========================\n")
+@app.cli.command("check-indexes")
+@click.option("--verbose", is_flag=True, help="Print the full plan of every query.")
+def check_indexes(verbose):
+    """Fail if any hot list/filter query does a full table scan."""
+    from backend.utils.query_plans import find_full_scans
+
+    with app.app_context():
+        failed = False
+        for name, (scans, plan) in find_full_scans().items():
+            status = "FULL SCAN" if scans else "ok"
+            print(f"[{status}] {name}")
+            if scans or verbose:
+                for line in plan:
+                    print(f"    {line}")
+            failed = failed or bool(scans)
+    sys.exit(1 if failed else 0)
+
+
+@app.cli.command("overdue-alerts")
+@click.option("--loop", is_flag=True, help="Keep running, scanning every --interval seconds.")
+@click.option("--interval", type=float, default=None, help="Seconds between scans (default OVERDUE_SCAN_INTERVAL).")
+def overdue_alerts(loop, interval):
+    """Create overdue/reminder alerts for active loans past (or near) their due date."""
+    from backend.jobs.overdue_alerts import run_overdue_scan
+
+    interval = interval or app.config["OVERDUE_SCAN_INTERVAL"]
+    while True:
+        with app.app_context():
+            try:
+                result = run_overdue_scan()
+            except Exception as exc:
+                if not loop:
+                    raise
+                print(f"overdue scan failed: {exc}", file=sys.stderr)
+            else:
+                print(
+                    f"overdue={result['overdue']} reminder={result['reminder']} "
+                    f"in {result['duration_ms']} ms"
+                )
+        if not loop:
+            break
+        time.sleep(interval)
+
+
+@app.cli.command("archive-loans")
+@click.option("--older-than-days", type=float, default=None, help="Age of closed loans to archive (default LOAN_ARCHIVE_AFTER_DAYS).")
+@click.option("--batch-size", type=int, default=None, help="Loans per transaction (default LOAN_ARCHIVE_BATCH_SIZE).")
+def archive_loans(older_than_days, batch_size):
+    """Move old returned/rejected/cancelled loans and their alerts to the archive tables."""
+    from backend.jobs.archive_loans import archive_loans as run_archive
+
+    with app.app_context():
+        result = run_archive(older_than_days=older_than_days, batch_size=batch_size)
+    print(f"loans={result['loans']} alerts={result['alerts']} in {result['duration_ms']} ms")
+
 
+@app.cli.command("reconcile-counters")
+def reconcile_counters():
+    """Rebuild the per-user and per-equipment loan counters from the loans (and archive) tables."""
+    from backend.utils.usage_counters import reconcile_counters as rebuild
+
+    with app.app_context():
+        started = time.perf_counter()
+        counts = rebuild()
+        db.session.commit()
+        elapsed = time.perf_counter() - started
+    print(f"users={counts['users']} equipments={counts['equipments']} in {elapsed:.1f} s")
+
+
+@app.cli.command("rollup-loans")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="Recompute from this day (default: LOAN_ROLLUP_LOOKBACK_DAYS before the last refreshed day).")
+@click.option("--full", is_flag=True, help="Recompute from the oldest loan.")
+def rollup_loans(since, full):
+    """Refresh the daily loan rollups behind /api/reports."""
+    from backend.jobs.loan_rollups import refresh_rollups
+
+    with app.app_context():
+        result = refresh_rollups(since=since.date() if since else None, full=full)
+    print(f"days={result['days']} rows={result['rows']} in {result['duration_ms']} ms")
+
+
+@app.cli.command("search-reindex")
+def search_reindex():
+    """Rebuild the full-text search index from the users, equipments and loans tables."""
+    from backend.utils.search import rebuild_index, supported
+
+    with app.app_context():
+        if not supported():
+            print("Full-text search is not available on this database; nothing to do.")
+            return
+        started = time.perf_counter()
+        counts = rebuild_index()
+        elapsed = time.perf_counter() - started
+        print(", ".join(f"{kind}={count}" for kind, count in counts.items()) + f" in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    # `flask routes` lists the URL map
     app.run(debug=True)
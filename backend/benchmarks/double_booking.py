@@ -0,0 +1,86 @@
+"""Stress test: many threads try to loan the same equipment at once.
+
+    python -m backend.benchmarks.double_booking --threads 16 --rounds 20
+
+Every round resets one equipment to ``available`` and fires ``--threads``
+concurrent ``POST /api/loans`` requests for it as an admin. Exactly one must
+win (201); the rest must see it as unavailable (400) or conflicting (409).
+Exits non-zero if any round double-books.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+from backend import create_app, db
+from backend.models import User, Equipment, Loan
+from backend.controllers.auth_controller import generate_token
+
+
+def run(threads: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(tmp, 'stress.db')}"
+        app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": uri})
+        with app.app_context():
+            db.create_all()
+            admin = User(name="Admin", email="admin@example.com", password="x", role="admin")
+            equipment = Equipment(name="Projector", type="projector")
+            db.session.add_all([admin, equipment])
+            db.session.commit()
+            token = generate_token(admin)
+            user_id, equipment_id = admin.id, equipment.id
+
+        headers = {"Authorization": f"Bearer {token}"}
+        failures = 0
+        totals = Counter()
+        for round_no in range(rounds):
+            with app.app_context():
+                Loan.query.delete()
+                db.session.get(Equipment, equipment_id).status = "available"
+                db.session.commit()
+
+            barrier = threading.Barrier(threads)
+            statuses = []
+            lock = threading.Lock()
+
+            def request_loan():
+                client = app.test_client()
+                barrier.wait()
+                response = client.post(
+                    "/api/loans", headers=headers, json={"user_id": user_id, "equipment_id": equipment_id}
+                )
+                with lock:
+                    statuses.append(response.status_code)
+
+            workers = [threading.Thread(target=request_loan) for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            with app.app_context():
+                active = Loan.query.filter_by(equipment_id=equipment_id, status="active").count()
+            counts = Counter(statuses)
+            totals.update(counts)
+            if counts[201] != 1 or active != 1:
+                failures += 1
+                print(f"round {round_no}: {dict(counts)} active loans={active}  <-- DOUBLE BOOKED")
+        return failures, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    failures, totals = run(args.threads, args.rounds)
+    print(f"{args.rounds} rounds x {args.threads} threads, responses: {dict(totals)}")
+    print("OK: exactly one loan per round" if not failures else f"FAILED in {failures} rounds")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
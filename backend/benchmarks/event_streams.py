@@ -0,0 +1,175 @@
+"""API latency while /api/events streams are open, through gunicorn.
+
+    python -m backend.benchmarks.event_streams                 # gunicorn.conf's default worker
+    python -m backend.benchmarks.event_streams --worker-class gthread --streams 8
+    python -m backend.benchmarks.event_streams --max-ms 500    # exit 1 above this (CI)
+
+Starts ``gunicorn -c backend/gunicorn.conf.py backend.wsgi:app`` (run from the
+repository root) with one worker on a throwaway SQLite database, opens
+``--streams`` event streams that stay connected, then sends ``--requests``
+``GET /api/equipments`` one at a time. Each request gets ``--max-ms``
+before it counts as an error. With gthread, streams beyond ``WEB_THREADS``
+wait for a thread, and so does every API request. Exits non-zero if a
+stream fails to open or any request errors.
+"""
+import argparse
+import http.client
+import json
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend import create_app, db
+from backend.models import Equipment, User
+from backend.controllers.auth_controller import generate_token
+from backend.benchmarks.load_test import summarize
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STARTUP_SECONDS = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _prepare(uri: str, secret: str) -> str:
+    """Create the schema, an admin and a page of equipments; returns the admin's token."""
+    app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": uri, "SECRET_KEY": secret})
+    with app.app_context():
+        db.create_all()
+        admin = User(name="Admin", email="admin@example.com", password="x", role="admin")
+        db.session.add(admin)
+        db.session.add_all(Equipment(name=f"Laptop {i}", type="laptop") for i in range(50))
+        db.session.commit()
+        return generate_token(admin)
+
+
+def _start_server(uri: str, secret: str, port: int, worker_class: str | None):
+    env = dict(
+        os.environ,
+        FLASK_ENV="testing",
+        TEST_DATABASE_URL=uri,
+        SECRET_KEY=secret,
+        BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY="1",
+    )
+    if worker_class:
+        env["GUNICORN_WORKER_CLASS"] = worker_class
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py", "backend.wsgi:app"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _request(port, method, path, token, timeout):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request(method, path, headers={"Authorization": f"Bearer {token}"})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def _wait_ready(server, port, token):
+    deadline = time.monotonic() + STARTUP_SECONDS
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        try:
+            if _request(port, "GET", "/api/equipments?limit=1", token, timeout=1)[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not answer within {STARTUP_SECONDS}s")
+
+
+def _open_stream(port, ticket, timeout):
+    """Connect and read the response head; the body is left unread and the connection open."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request("GET", f"/api/events?ticket={ticket}")
+        if connection.getresponse().status == 200:
+            return connection
+    except OSError:
+        pass
+    connection.close()
+    return None
+
+
+def run(streams: int, requests: int, max_ms: float, worker_class: str | None):
+    secret = secrets.token_hex(32)
+    timeout = max_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'events.db')}"
+        token = _prepare(uri, secret)
+        port = _free_port()
+        server = _start_server(uri, secret, port, worker_class)
+        connections = []
+        try:
+            _wait_ready(server, port, token)
+            # Tickets first: once the streams are up, a starved server could not hand them out
+            tickets = [
+                json.loads(_request(port, "POST", "/api/events/ticket", token, timeout=5)[1])["ticket"]
+                for _ in range(streams)
+            ]
+            connections = [_open_stream(port, ticket, timeout) for ticket in tickets]
+
+            samples, errors = [], 0
+            for _ in range(requests):
+                start = time.perf_counter()
+                try:
+                    status = _request(port, "GET", "/api/equipments?limit=50", token, timeout)[0]
+                except OSError:
+                    status = None
+                samples.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            for connection in connections:
+                if connection is not None:
+                    connection.close()
+            # Quick shutdown: a graceful one would wait for the streams to end
+            server.send_signal(signal.SIGQUIT)
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    return {
+        "worker_class": worker_class or "gunicorn.conf default",
+        "streams": streams,
+        "streams_open": sum(connection is not None for connection in connections),
+        "api": summarize(samples, errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=50, help="Event streams held open during the run")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--max-ms", type=float, default=2000, help="Per-request (and stream connect) timeout")
+    parser.add_argument("--worker-class", help="Overrides GUNICORN_WORKER_CLASS, e.g. gthread or gevent")
+    args = parser.parse_args()
+
+    results = run(args.streams, args.requests, args.max_ms, args.worker_class)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+    ok = results["streams_open"] == results["streams"] and not results["api"]["errors"]
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Throughput and latency of the main API flows against a seeded database.
+
+    python -m backend.benchmarks.load_test --scale small --requests 200 --output before.json
+    python -m backend.benchmarks.load_test --scale small --requests 200 --compare before.json
+
+Seeds a throwaway SQLite file (or ``--database-url``; an already seeded
+database is reused as-is) with ``backend.benchmarks.seed``, then drives the
+real app through the Flask test client, or through a local threaded WSGI
+server with ``--server``. Requests are sent one at a time, so the numbers are
+per-request latency rather than saturation throughput. Results are written
+as JSON (flows -> req/s and p50/p95/p99 ms) for comparison between commits.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from backend import create_app, db
+from backend.models import Equipment, User
+from backend.controllers.auth_controller import generate_token
+from backend.benchmarks import seed as seeding
+
+
+# Rate limits and the login throttle would turn most of the run into 429s
+BENCH_OVERRIDES = {
+    "AUTH_RATE_LIMIT_PER_EMAIL": 10**9,
+    "AUTH_RATE_LIMIT_PER_IP": 10**9,
+    "SLOW_REQUEST_MS": 0,
+}
+PAGE = "limit=50"
+
+
+class TestClientDriver:
+    name = "test-client"
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class ServerDriver:
+    """Keep-alive HTTP/1.1 client against a threaded Werkzeug server on a free port."""
+
+    name = "wsgi-server"
+
+    def __init__(self, app):
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port)
+
+    def request(self, method, path, token=None, body=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+    def close(self):
+        self.connection.close()
+        self.server.shutdown()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def timed(self, flow, driver, expected, *args, **kwargs):
+        start = time.perf_counter()
+        status, body = driver.request(*args, **kwargs)
+        self.samples.setdefault(flow, []).append(time.perf_counter() - start)
+        if status != expected:
+            self.errors[flow] = self.errors.get(flow, 0) + 1
+        return status, body
+
+    def summary(self):
+        return {flow: summarize(samples, self.errors.get(flow, 0)) for flow, samples in self.samples.items()}
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_samples) - 1, round(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples, errors):
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / total, 1) if total else None,
+        "mean_ms": round(total / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def _actors():
+    """Users driving the flows: the admin, a teacher, and the first student."""
+    admin = User.query.filter_by(role="admin").order_by(User.id).first()
+    teacher = User.query.filter_by(role="teacher").order_by(User.id).first() or admin
+    student = User.query.filter_by(role="student").order_by(User.id).first() or teacher
+    # A dedicated equipment cycles through create -> approve -> close
+    equipment = Equipment(name="Load test equipment", type="laptop", status="available")
+    db.session.add(equipment)
+    db.session.commit()
+    students = [u.email for u in User.query.filter_by(role="student").limit(1000)]
+    return {
+        "admin": generate_token(admin),
+        "teacher": generate_token(teacher),
+        "teacher_id": teacher.id,
+        "student": generate_token(student),
+        "student_emails": students or [admin.email],
+        "equipment_id": equipment.id,
+    }
+
+
+def run_flows(driver, actors, requests, warmup, rng):
+    recorder = Recorder()
+    admin, teacher, student = actors["admin"], actors["teacher"], actors["student"]
+    reads = [
+        ("list_equipments", "GET", f"/api/equipments?{PAGE}", student),
+        ("list_loans", "GET", f"/api/loans?{PAGE}", admin),
+        ("my_loans", "GET", f"/api/loans/me?{PAGE}", student),
+    ]
+
+    for iteration in range(warmup + requests):
+        if iteration == warmup:
+            recorder = Recorder()
+        email = rng.choice(actors["student_emails"])
+        recorder.timed(
+            "login", driver, 200, "POST", "/api/auth/login",
+            body={"email": email, "password": seeding.SEED_PASSWORD},
+        )
+        for flow, method, path, token in reads:
+            recorder.timed(flow, driver, 200, method, path, token=token)
+
+        status, body = recorder.timed(
+            "create_loan", driver, 201, "POST", "/api/loans", token=teacher,
+            body={"user_id": actors["teacher_id"], "equipment_id": actors["equipment_id"]},
+        )
+        if status != 201:
+            continue
+        loan_id = body["loan"]["id"]
+        recorder.timed("approve_loan", driver, 200, "POST", f"/api/loans/{loan_id}/approve", token=admin)
+        recorder.timed("close_loan", driver, 200, "POST", f"/api/loans/{loan_id}/close", token=admin)
+    return recorder.summary()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(database_url, volumes, requests, warmup, use_server, random_seed):
+    app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": database_url, **BENCH_OVERRIDES})
+    with app.app_context():
+        db.create_all()
+        seeded = seeding.seed(**volumes, random_seed=random_seed) if seeding.is_empty() else None
+        actors = _actors()
+        dialect = db.engine.dialect.name
+
+    driver = ServerDriver(app) if use_server else TestClientDriver(app)
+    try:
+        flows = run_flows(driver, actors, requests, warmup, random.Random(random_seed))
+    finally:
+        driver.close()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": dialect,
+            "driver": driver.name,
+            "requests_per_flow": requests,
+            "volumes": volumes,
+            "seeded": seeded,
+        },
+        "flows": flows,
+    }
+
+
+def compare(baseline, current, out=sys.stdout):
+    print(f"{'flow':<16}{'req/s':>18}{'p50 ms':>20}{'p95 ms':>20}{'p99 ms':>20}", file=out)
+    for flow, now in current["flows"].items():
+        before = baseline.get("flows", {}).get(flow)
+        cells = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if before and before.get(key) and now.get(key) is not None:
+                change = (now[key] - before[key]) / before[key] * 100
+                cells.append(f"{now[key]:>10} ({change:+5.1f}%)")
+            else:
+                cells.append(f"{now[key]!s:>18}")
+        print(f"{flow:<16}" + "".join(f"{cell:>20}" for cell in cells), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+    seeding.add_volume_arguments(parser)
+    parser.add_argument("--requests", type=int, default=200, help="Measured iterations per flow")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--server", action="store_true", help="Go through a local WSGI server over HTTP")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="Print changes against an earlier results file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        results = run(url, seeding.volumes_from_args(args), args.requests, args.warmup, args.server, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(json.load(fh), results, out=sys.stdout if args.output else sys.stderr)
+    errors = sum(flow["errors"] for flow in results["flows"].values())
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Requests/sec for GET /api/equipments with and without the principal cache.
+
+    python -m backend.benchmarks.principal_cache --requests 2000
+
+Uses a throwaway SQLite file (or TEST_DATABASE_URL) through the Flask test
+client, so the numbers compare code paths rather than network overhead.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backend import create_app, db
+from backend.models import User, Equipment
+from backend.controllers.auth_controller import generate_token, principal_cache
+
+
+MODES = {
+    "no-cache": {"PRINCIPAL_CACHE_TTL": 0, "TRUST_TOKEN_ROLE_FOR_READS": False},
+    "cache": {"PRINCIPAL_CACHE_TTL": 60, "TRUST_TOKEN_ROLE_FOR_READS": False},
+    "trust-token-role": {"PRINCIPAL_CACHE_TTL": 60, "TRUST_TOKEN_ROLE_FOR_READS": True},
+}
+
+
+def run(requests: int, equipments: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": uri})
+        with app.app_context():
+            db.create_all()
+            user = User(name="Bench", email="bench@example.com", password="x", role="student")
+            db.session.add(user)
+            db.session.add_all(
+                Equipment(name=f"Equipment {i}", type="laptop") for i in range(equipments)
+            )
+            db.session.commit()
+            token = generate_token(user)
+
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        results = {}
+        for mode, overrides in MODES.items():
+            app.config.update(overrides)
+            principal_cache.clear()
+            # the list is streamed: read it to the end (which also closes it),
+            # so each request pays for the whole response and frees its session
+            client.get("/api/equipments", headers=headers).get_data()  # warm up
+
+            start = time.perf_counter()
+            for _ in range(requests):
+                response = client.get("/api/equipments", headers=headers)
+                assert response.status_code == 200, response.status_code
+                response.get_data()
+            elapsed = time.perf_counter() - start
+            results[mode] = requests / elapsed
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--equipments", type=int, default=10)
+    args = parser.parse_args()
+
+    results = run(args.requests, args.equipments)
+    baseline = results["no-cache"]
+    for mode, rps in results.items():
+        print(f"{mode:>18}: {rps:8.1f} req/s  ({rps / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Deterministic synthetic data for load tests.
+
+    python -m backend.benchmarks.seed --database-url sqlite:////tmp/bench.db --scale large
+
+Rows are generated from a fixed random seed and a fixed base date, so two
+runs with the same volumes produce the same database. They are written with
+multi-row INSERTs in batches and explicit ids (the database must be empty),
+bypassing the API so seeding 1M+ rows takes seconds rather than hours.
+
+Every seeded user has the password ``SEED_PASSWORD``; user 1 is an admin.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+
+from backend import create_app, db
+from backend.models import Alert, Equipment, Loan, User
+from backend.controllers.auth_controller import hash_password
+from backend.utils.search import rebuild_index, supported as search_supported
+from backend.jobs.loan_rollups import refresh_rollups
+from backend.utils.usage_counters import reconcile_counters
+
+
+SEED_PASSWORD = "bench-password"
+BASE_DATE = datetime(2025, 1, 1)
+
+SCALES = {
+    "small": {"users": 1_000, "equipments": 500, "loans": 20_000, "alerts": 40_000},
+    "large": {"users": 10_000, "equipments": 5_000, "loans": 500_000, "alerts": 1_000_000},
+}
+
+EQUIPMENT_TYPES = ["laptop", "projector", "tablet", "camera"]
+LOAN_STATUSES = ["returned", "active", "pending", "rejected", "cancelled"]
+LOAN_STATUS_WEIGHTS = [80, 8, 5, 5, 2]
+ALERT_TYPES = ["overdue", "reminder", "returned"]
+
+
+def _user_rows(count, password_hash, rng):
+    for i in range(1, count + 1):
+        role = "admin" if i == 1 else ("teacher" if rng.random() < 0.05 else "student")
+        yield {
+            "id": i,
+            "name": f"User {i}",
+            "email": f"user{i}@bench.test",
+            "password": password_hash,
+            "role": role,
+            "created_at": BASE_DATE - timedelta(days=rng.randint(0, 730)),
+        }
+
+
+def _equipment_rows(count, rng):
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "name": f"Equipment {i}",
+            "type": rng.choice(EQUIPMENT_TYPES),
+            "status": "under_maintenance" if rng.random() < 0.03 else "available",
+            "description": None,
+            "created_at": BASE_DATE - timedelta(days=rng.randint(0, 730)),
+        }
+
+
+def _loan_rows(count, users, equipments, rng):
+    for i in range(1, count + 1):
+        status = rng.choices(LOAN_STATUSES, LOAN_STATUS_WEIGHTS)[0]
+        loan_date = BASE_DATE - timedelta(seconds=rng.randint(0, 730 * 86400))
+        yield {
+            "id": i,
+            "user_id": rng.randint(1, users),
+            "equipment_id": rng.randint(1, equipments),
+            "loan_date": loan_date,
+            "start_date": loan_date,
+            "return_date": loan_date + timedelta(hours=rng.randint(1, 240)) if status == "returned" else None,
+            "due_date": loan_date + timedelta(days=7) if status in {"active", "returned"} else None,
+            "status": status,
+        }
+
+
+def _alert_rows(count, loans, rng):
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "loan_id": rng.randint(1, loans),
+            "alert_type": rng.choice(ALERT_TYPES),
+            "date": BASE_DATE - timedelta(seconds=rng.randint(0, 730 * 86400)),
+        }
+
+
+def _insert_batches(model, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(model), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+
+
+def is_empty() -> bool:
+    return not db.session.query(func.count(User.id)).scalar()
+
+
+def seed(users, equipments, loans, alerts, random_seed=42, batch_size=10_000) -> dict:
+    """Fill an empty database (inside an app context); returns rows per table and seconds taken."""
+    if not is_empty():
+        raise RuntimeError("Refusing to seed a database that already has users")
+    if users < 1 or equipments < 1:
+        raise ValueError("Need at least one user and one equipment")
+    rng = random.Random(random_seed)
+    started = time.perf_counter()
+
+    # One hash shared by every user: hashing 10k passwords would dominate seeding
+    password_hash = hash_password(SEED_PASSWORD)
+    _insert_batches(User, _user_rows(users, password_hash, rng), batch_size)
+    _insert_batches(Equipment, _equipment_rows(equipments, rng), batch_size)
+    _insert_batches(Loan, _loan_rows(loans, users, equipments, rng), batch_size)
+    if loans:
+        _insert_batches(Alert, _alert_rows(alerts, loans, rng), batch_size)
+    reconcile_counters()
+    db.session.commit()
+    refresh_rollups(full=True)
+    if search_supported():
+        rebuild_index()
+
+    return {
+        "users": users,
+        "equipments": equipments,
+        "loans": loans,
+        "alerts": alerts if loans else 0,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def add_volume_arguments(parser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("users", "equipments", "loans", "alerts"):
+        parser.add_argument(f"--{name}", type=int, help=f"Override the number of {name} of --scale")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+
+
+def volumes_from_args(args) -> dict:
+    volumes = dict(SCALES[args.scale])
+    for name in volumes:
+        if getattr(args, name) is not None:
+            volumes[name] = getattr(args, name)
+    return volumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": args.database_url})
+    with app.app_context():
+        db.create_all()
+        result = seed(**volumes_from_args(args), random_seed=args.seed)
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Cold-start time of the app factory: web app vs CLI/worker app.
+
+    python -m backend.benchmarks.startup --runs 7
+    python -m backend.benchmarks.startup --max-ms 700     # exit 1 above this (CI)
+    python -m backend.benchmarks.startup --top 15         # slowest imports
+
+Every run is a fresh interpreter (run from the repository root) that imports
+``backend`` and calls ``create_app("testing")`` with an in-memory SQLite
+database. Medians of the import, ``create_app`` and total time are reported
+per mode, with the number of loaded modules; ``--max-ms`` fails when a mode's
+median total exceeds it, so an eager heavy import shows up as a regression.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+MODES = {
+    "web": "all",
+    "worker": "none",
+}
+
+SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from backend import create_app
+imported = time.perf_counter()
+create_app("testing", {"SQLALCHEMY_DATABASE_URI": "sqlite://", "APP_BLUEPRINTS": sys.argv[1]})
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "total_ms": (created - started) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run_once(blueprints: str, *flags) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", SNIPPET, blueprints],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure(runs: int) -> dict:
+    results = {}
+    for mode, blueprints in MODES.items():
+        samples = [json.loads(_run_once(blueprints).stdout) for _ in range(runs)]
+        results[mode] = {
+            key: round(statistics.median(sample[key] for sample in samples), 1)
+            for key in ("import_ms", "create_app_ms", "total_ms", "modules")
+        }
+    return results
+
+
+def slowest_imports(blueprints: str, top: int):
+    """(cumulative ms, module) of the ``top`` slowest top-level imports, from ``-X importtime``."""
+    stderr = _run_once(blueprints, "-X", "importtime").stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            imports.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, help="Fail if a mode's median total exceeds this")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports of the web app")
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    for mode, result in results.items():
+        print(
+            f"{mode:>7}: import {result['import_ms']:7.1f} ms  create_app {result['create_app_ms']:6.1f} ms  "
+            f"total {result['total_ms']:7.1f} ms  ({int(result['modules'])} modules)"
+        )
+    if args.top:
+        print("\nslowest imports (web, cumulative):")
+        for ms, name in slowest_imports(MODES["web"], args.top):
+            print(f"{ms:8.1f} ms  {name}")
+
+    if args.max_ms is not None:
+        slow = [mode for mode, result in results.items() if result["total_ms"] > args.max_ms]
+        if slow:
+            print(f"\nstartup over {args.max_ms} ms: {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,15 +12,123 @@ class Config:
         f"{os.getenv('MYSQL_DB','equipment_loans')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replicas (comma-separated SQLAlchemy URIs): GET requests to
+    # these blueprints read from one of them (see utils/replicas.py)
+    READ_REPLICA_URIS = [uri.strip() for uri in os.getenv("READ_REPLICA_URIS", "").split(",") if uri.strip()]
+    READ_REPLICA_BLUEPRINTS = ("loans", "users", "equipments", "alerts")
     JWT_ALGORITHM = "HS256"
     PERMANENT_SESSION_LIFETIME = timedelta(hours=8)
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
+    # Seconds the /api/stats aggregate is reused before being recomputed
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "10"))
+    # Seconds an authenticated user's id/role/name is reused by token_required (0 disables)
+    PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    # Seconds a verified JWT's claims are reused (capped by the token's exp; 0 disables)
+    TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+    # Accept the signed role claim on GET requests without looking the user up
+    TRUST_TOKEN_ROLE_FOR_READS = os.getenv("TRUST_TOKEN_ROLE_FOR_READS", "false").lower() == "true"
+
+    # Times a loan/equipment transition is re-run after losing a concurrent update
+    TRANSACTION_RETRIES = int(os.getenv("TRANSACTION_RETRIES", "3"))
+
+    # Werkzeug hash method, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+    # Stored hashes made with other parameters are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+    # Threads dedicated to hashing (0 = hash inline in the request thread, or
+    # WEB_THREADS of them under gevent) and how many hashes may be queued
+    # before requests are refused with 503
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+    # Rows fetched per round trip while streaming full list responses
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+    # Rows per INSERT/commit for bulk imports and per fetch for exports
+    BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+    # Hash method for imported users (empty = PASSWORD_HASH_METHOD); upgraded on first login
+    BULK_IMPORT_HASH_METHOD = os.getenv("BULK_IMPORT_HASH_METHOD", "")
+
+    # Token buckets for /api/auth/login and /register: burst size and tokens regained per minute
+    AUTH_RATE_LIMIT_PER_EMAIL = int(os.getenv("AUTH_RATE_LIMIT_PER_EMAIL", "5"))
+    AUTH_RATE_LIMIT_PER_EMAIL_REFILL = float(os.getenv("AUTH_RATE_LIMIT_PER_EMAIL_REFILL", "5"))
+    AUTH_RATE_LIMIT_PER_IP = int(os.getenv("AUTH_RATE_LIMIT_PER_IP", "20"))
+    AUTH_RATE_LIMIT_PER_IP_REFILL = float(os.getenv("AUTH_RATE_LIMIT_PER_IP_REFILL", "20"))
+
+    # Active loans one user may hold at a time (0 = no limit), checked from user_loan_stats
+    MAX_ACTIVE_LOANS_PER_USER = int(os.getenv("MAX_ACTIVE_LOANS_PER_USER", "0"))
+
+    # Days an approved loan runs before it is due (when no due_date is given)
+    LOAN_DURATION_DAYS = float(os.getenv("LOAN_DURATION_DAYS", "7"))
+    # Hours before the due date that a "reminder" alert is raised
+    LOAN_REMINDER_HOURS = float(os.getenv("LOAN_REMINDER_HOURS", "24"))
+    # Seconds between overdue scans of `flask overdue-alerts --loop`
+    OVERDUE_SCAN_INTERVAL = float(os.getenv("OVERDUE_SCAN_INTERVAL", "300"))
+    # `flask archive-loans` moves closed loans (and their alerts) older than this to the archive tables
+    LOAN_ARCHIVE_AFTER_DAYS = float(os.getenv("LOAN_ARCHIVE_AFTER_DAYS", "365"))
+    LOAN_ARCHIVE_BATCH_SIZE = int(os.getenv("LOAN_ARCHIVE_BATCH_SIZE", "1000"))
+    # `flask rollup-loans` recomputes the daily rollups from this many days before the last one it refreshed
+    LOAN_ROLLUP_LOOKBACK_DAYS = int(os.getenv("LOAN_ROLLUP_LOOKBACK_DAYS", "7"))
+
+    # Per-route latency/query metrics on /api/metrics: Bearer METRICS_TOKEN when set, else an admin JWT
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    # Log requests slower than this many ms together with their SQL (0 disables)
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+    # Compress JSON/CSV responses larger than COMPRESS_MIN_SIZE bytes (gzip, or brotli if installed)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+    # Use the full-text search index (SQLite FTS5 / MySQL FULLTEXT) for ?q= and /api/search
+    SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+
+    # Server-sent change events on /api/events. EVENTS_BROKER is an optional
+    # "module:factory" for a shared pub/sub; the default is per worker process.
+    EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "true").lower() == "true"
+    EVENTS_BROKER = os.getenv("EVENTS_BROKER", "")
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    # Streams end after this long; browsers reconnect with Last-Event-ID
+    EVENTS_STREAM_SECONDS = float(os.getenv("EVENTS_STREAM_SECONDS", "300"))
+    EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+    EVENTS_REPLAY_SIZE = int(os.getenv("EVENTS_REPLAY_SIZE", "1000"))
+    # Lifetime of the ?ticket= from POST /api/events/ticket; it only has to
+    # outlive the EventSource connect, and URLs end up in access logs
+    STREAM_TICKET_SECONDS = int(os.getenv("STREAM_TICKET_SECONDS", "60"))
+
+    # Blueprints the app serves: "all", "none" (CLI jobs, schedulers) or a
+    # comma-separated list of names from backend.BLUEPRINTS; others are never imported
+    APP_BLUEPRINTS = os.getenv("APP_BLUEPRINTS", "all")
+
+    # Request threads per worker process (gunicorn.conf.py); checked against the pool size
+    WEB_THREADS = int(os.getenv("WEB_THREADS", "4"))
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
+class ProductionConfig(Config):
+    DEBUG = False
+    # Per worker process: keep DB_POOL_SIZE >= WEB_THREADS so requests never queue
+    # for a connection; recycle below MySQL's wait_timeout (and any proxy's idle
+    # timeout) and ping on checkout so dropped connections are replaced, not used
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite://")
+
 config_by_name = {
     "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
 }
 
 def get_config(name: str = None):
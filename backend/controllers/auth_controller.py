@@ -1,20 +1,206 @@
-from functools import wraps
+import hashlib
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
 from datetime import datetime, timedelta
+from typing import NamedTuple
 
-import jwt
 from flask import current_app, request, jsonify, g
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from backend import db
-from backend.models import User
+from backend.models import User, normalize_email
+from backend.utils.cache import TTLCache
+from backend.utils.rate_limit import TokenBucketLimiter
+
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Principal(NamedTuple):
+    """The authenticated caller as seen by controllers (``g.current_user``)."""
+
+    id: int
+    role: str
+    name: str | None = None
+
+
+# user id -> Principal; saves the User lookup on every protected request.
+principal_cache = TTLCache(maxsize=10_000)
+
+
+# sha256(token) -> verified claims; the frontend reuses one token for a whole
+# session, so the HS256 check and claim parsing only happen once per worker.
+token_cache = TTLCache(maxsize=10_000)
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate(user_id)
+
+
+def load_principal(user_id: int):
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    principal = Principal(id=user.id, role=user.role, name=user.name)
+    principal_cache.set(user_id, principal, ttl=current_app.config["PRINCIPAL_CACHE_TTL"])
+    return principal
+
+
+auth_limiter = TokenBucketLimiter()
+
+
+class PasswordHashBusy(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+_hash_pool = None
+_hash_slots = None
+_hash_pool_lock = threading.Lock()
+
+
+def _gevent_patched() -> bool:
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def _hash_workers() -> int:
+    workers = current_app.config["PASSWORD_HASH_WORKERS"]
+    if workers <= 0 and _gevent_patched():
+        # Hashing inline would block the event loop, and with it every
+        # request and stream of the worker; run as many at once as gthread would.
+        return current_app.config["WEB_THREADS"]
+    return workers
+
+
+def _hash_executor_class():
+    # Under gevent's monkeypatching (the gunicorn default) the stdlib pool's
+    # threads are greenlets too. gevent's executor runs on native threads, its
+    # futures wait cooperatively, and their callbacks run in the event loop.
+    if _gevent_patched():
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+
+        return NativeThreadPoolExecutor
+    return ThreadPoolExecutor
+
+
+def _get_hash_pool(workers: int, max_pending: int):
+    global _hash_pool, _hash_slots
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_slots = threading.BoundedSemaphore(max(workers, max_pending))
+                _hash_pool = _hash_executor_class()(max_workers=workers, thread_name_prefix="password-hash")
+    return _hash_pool, _hash_slots
+
+
+def _run_hashing(fn, *args):
+    # hashlib's scrypt/pbkdf2 release the GIL, so a small dedicated pool caps
+    # how many CPU-heavy hashes run at once; extra callers fail fast instead
+    # of tying up every request worker.
+    workers = _hash_workers()
+    if workers <= 0:
+        return fn(*args)
+
+    pool, slots = _get_hash_pool(workers, current_app.config["PASSWORD_HASH_MAX_PENDING"])
+    if not slots.acquire(blocking=False):
+        raise PasswordHashBusy()
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_passwords(passwords, method: str, salt_length: int) -> list:
+    """Hash many passwords (bulk imports) on the same bounded pool as logins.
+
+    Waits for free slots instead of failing, and keeps at most
+    ``PASSWORD_HASH_WORKERS`` hashes queued at a time, so logins never wait
+    behind more than one round of import hashes.
+    """
+    workers = _hash_workers()
+    if workers <= 0:
+        return [generate_password_hash(password, method, salt_length) for password in passwords]
+
+    pool, slots = _get_hash_pool(workers, current_app.config["PASSWORD_HASH_MAX_PENDING"])
+    hashes, in_flight = [], deque()
+    for password in passwords:
+        if len(in_flight) >= workers:
+            hashes.append(in_flight.popleft().result())
+        slots.acquire()
+        future = pool.submit(generate_password_hash, password, method, salt_length)
+        future.add_done_callback(lambda _: slots.release())
+        in_flight.append(future)
+    hashes.extend(future.result() for future in in_flight)
+    return hashes
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    # Expand shorthands like "scrypt" into the exact parameter string Werkzeug stores.
+    return generate_password_hash("", method=method, salt_length=1).split("$", 1)[0]
 
 
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    return _run_hashing(
+        generate_password_hash,
+        password,
+        current_app.config["PASSWORD_HASH_METHOD"],
+        current_app.config["PASSWORD_SALT_LENGTH"],
+    )
 
 
 def verify_password(hash_: str, password: str) -> bool:
-    return check_password_hash(hash_, password)
+    return _run_hashing(check_password_hash, hash_, password)
+
+
+def password_needs_rehash(hash_: str) -> bool:
+    return hash_.split("$", 1)[0] != _method_prefix(current_app.config["PASSWORD_HASH_METHOD"])
+
+
+def _rate_limited(*checks):
+    """Consume a token from each ``(key, capacity, refill_per_minute)`` bucket."""
+    for key, capacity, refill_per_minute in checks:
+        allowed, retry_after = auth_limiter.acquire(key, capacity, refill_per_minute / 60.0)
+        if not allowed:
+            body = {"message": "Too many attempts, try again later"}
+            if retry_after is not None:
+                body["retry_after"] = int(retry_after) + 1
+            return body, 429
+    return None
+
+
+def _auth_rate_limits(email):
+    # runs before the other checks of login/register, on the raw JSON value
+    if email is not None and not isinstance(email, str):
+        return {"message": "Invalid email"}, 400
+    config = current_app.config
+    checks = [
+        (f"ip:{request.remote_addr}", config["AUTH_RATE_LIMIT_PER_IP"], config["AUTH_RATE_LIMIT_PER_IP_REFILL"]),
+    ]
+    if email:
+        checks.append(
+            (f"email:{normalize_email(email)}", config["AUTH_RATE_LIMIT_PER_EMAIL"], config["AUTH_RATE_LIMIT_PER_EMAIL_REFILL"])
+        )
+    return _rate_limited(*checks)
+
+
+def _jwt():
+    """PyJWT, imported on first use.
+
+    It (and cryptography, when installed) is a noticeable part of startup
+    that CLI jobs and workers never need.
+    """
+    import jwt
+
+    return jwt
 
 
 def generate_token(user: User) -> str:
@@ -24,7 +210,26 @@ def generate_token(user: User) -> str:
         "role": user.role,
         "exp": datetime.utcnow() + timedelta(hours=8),
     }
-    token = jwt.encode(
+    return _encode_token(payload)
+
+
+def generate_stream_ticket(user, purpose: str) -> str:
+    """A short-lived token for one URL-authenticated endpoint (``?ticket=``).
+
+    The ``purpose`` claim makes it useless as a bearer token, and its lifetime
+    (``STREAM_TICKET_SECONDS``) bounds what a logged URL is worth.
+    """
+    payload = {
+        "sub": str(user.id),
+        "role": user.role,
+        "purpose": purpose,
+        "exp": datetime.utcnow() + timedelta(seconds=current_app.config["STREAM_TICKET_SECONDS"]),
+    }
+    return _encode_token(payload)
+
+
+def _encode_token(payload) -> str:
+    token = _jwt().encode(
         payload,
         current_app.config["SECRET_KEY"],
         algorithm=current_app.config["JWT_ALGORITHM"],
@@ -36,29 +241,66 @@ def generate_token(user: User) -> str:
 
 
 def decode_token(token: str):
-    return jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=[current_app.config["JWT_ALGORITHM"]])
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
+    payload = _jwt().decode(token, current_app.config["SECRET_KEY"], algorithms=[current_app.config["JWT_ALGORITHM"]])
 
+    # Never keep an entry past the token's own expiry.
+    ttl = current_app.config["TOKEN_CACHE_TTL"]
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    token_cache.set(key, payload, ttl=ttl)
+    return dict(payload)
 
-def token_required(roles=None):
+
+def cache_stats():
+    return {"principals": principal_cache.stats(), "tokens": token_cache.stats()}
+
+
+def token_required(roles=None, query_ticket: str | None = None):
+    """``query_ticket`` names the purpose of a ``?ticket=`` the route also accepts
+    (for EventSource, which cannot set headers); see :func:`generate_stream_ticket`.
+    """
     roles = roles or []
 
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             auth_header = request.headers.get("Authorization", "")
-            if not auth_header.startswith("Bearer "):
+            if auth_header.startswith("Bearer "):
+                token, purpose = auth_header.split(" ", 1)[1], None
+            elif query_ticket and not auth_header and request.args.get("ticket"):
+                token, purpose = request.args["ticket"], query_ticket
+            else:
                 return jsonify({"message": "Authorization header missing or invalid"}), 401
 
-            token = auth_header.split(" ", 1)[1]
+            jwt = _jwt()
             try:
                 payload = decode_token(token)
+                # Tickets only open their own endpoint, and session tokens
+                # never go in a URL.
+                if payload.get("purpose") != purpose:
+                    return jsonify({"message": "Invalid token"}), 401
                 user_id = payload.get("sub")
                 try:
                     user_id = int(user_id)
                 except (TypeError, ValueError):
                     return jsonify({"message": "Invalid token"}), 401
 
-                user = User.query.get(user_id)
+                if (
+                    current_app.config["TRUST_TOKEN_ROLE_FOR_READS"]
+                    and request.method in READ_ONLY_METHODS
+                    and payload.get("role")
+                ):
+                    # The role claim is signed by us; for reads we accept it
+                    # as-is until the token expires instead of hitting the DB.
+                    user = Principal(id=user_id, role=payload["role"])
+                else:
+                    user = load_principal(user_id)
                 if not user:
                     return jsonify({"message": "User not found"}), 401
                 if roles and user.role not in roles:
@@ -82,13 +324,22 @@ def register_user(data):
     password = data.get("password")
     role = data.get("role", "student")
 
+    limited = _auth_rate_limits(email)
+    if limited:
+        return limited
+
     if not all([name, email, password]):
         return {"message": "Missing fields"}, 400
 
-    if User.query.filter_by(email=email).first():
+    if User.query.filter_by(email=normalize_email(email)).first():
         return {"message": "Email already registered"}, 400
 
-    user = User(name=name, email=email, password=hash_password(password), role=role)
+    try:
+        password_hash = hash_password(password)
+    except PasswordHashBusy:
+        return {"message": "Server busy, try again later"}, 503
+
+    user = User(name=name, email=email, password=password_hash, role=role)
     db.session.add(user)
     db.session.commit()
 
@@ -99,12 +350,24 @@ def login_user(data):
     email = data.get("email")
     password = data.get("password")
 
+    limited = _auth_rate_limits(email)
+    if limited:
+        return limited
+
     if not all([email, password]):
         return {"message": "Missing credentials"}, 400
 
-    user = User.query.filter_by(email=email).first()
-    if not user or not verify_password(user.password, password):
-        return {"message": "Invalid credentials"}, 401
+    user = User.query.filter_by(email=normalize_email(email)).first()
+    try:
+        if not user or not verify_password(user.password, password):
+            return {"message": "Invalid credentials"}, 401
+
+        # Upgrade hashes made with old/other parameters while we know the password.
+        if password_needs_rehash(user.password):
+            user.password = hash_password(password)
+            db.session.commit()
+    except PasswordHashBusy:
+        return {"message": "Server busy, try again later"}, 503
 
     token = generate_token(user)
     return {"token": token, "user": user.to_dict()}, 200
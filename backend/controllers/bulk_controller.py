@@ -0,0 +1,412 @@
+"""Bulk CSV/NDJSON import and streamed export for equipments, users and loans.
+
+Imports read the request body as a stream, validate row by row, and insert
+valid rows in batches of ``BULK_BATCH_SIZE`` with one multi-row INSERT and
+one commit per batch. Lookups needed for validation (existing emails, user
+and equipment ids) are done once per batch with ``IN (...)`` queries instead
+of once per row. Invalid rows are skipped and reported by line number.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy.exc import IntegrityError
+
+from backend import db
+from backend.models import Equipment, Loan, User, normalize_email
+from backend.controllers.auth_controller import hash_passwords
+from backend.controllers.equipment_controller import VALID_STATUSES
+from backend.controllers.loan_controller import VALID_LOAN_STATUSES, default_due_date
+from backend.controllers.reservation_controller import BOOKING_STATUSES, booking_end
+from backend.controllers.stats_controller import invalidate_stats
+from backend.utils.search import index_new_rows
+from backend.utils.usage_counters import HANDED_OUT_STATUSES, reconcile_counters
+
+
+CSV_MIMETYPES = {"text/csv", "application/csv"}
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+VALID_ROLES = {"admin", "teacher", "student"}
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_COLUMNS = {
+    "equipments": ["id", "name", "type", "status", "description", "created_at"],
+    "users": ["id", "name", "email", "role", "created_at"],
+    # every column import_loans reads, so an export re-imports with the same bookings
+    "loans": [
+        "id",
+        "user_id",
+        "equipment_id",
+        "loan_date",
+        "start_date",
+        "due_date",
+        "return_date",
+        "status",
+        "user_name",
+        "equipment_name",
+    ],
+}
+
+
+class BulkFormatError(ValueError):
+    pass
+
+
+def resolve_format(mimetype: str | None, requested: str | None) -> str:
+    if requested:
+        fmt = requested.lower()
+    elif mimetype in CSV_MIMETYPES:
+        fmt = "csv"
+    elif mimetype in NDJSON_MIMETYPES:
+        fmt = "ndjson"
+    else:
+        raise BulkFormatError("Unsupported format; send text/csv or application/x-ndjson, or pass ?format=")
+    if fmt not in {"csv", "ndjson"}:
+        raise BulkFormatError("Unsupported format; use csv or ndjson")
+    return fmt
+
+
+def _iter_rows(stream, fmt: str):
+    """Yield ``(line_no, row_dict_or_None, error_or_None)`` from a binary stream."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items() if k}, None
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, None, "Invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "Each line must be a JSON object"
+            continue
+        yield line_no, row, None
+
+
+def _parse_datetime(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _batches(stream, fmt: str, validate, report):
+    """Group validated rows into lists of ``BULK_BATCH_SIZE``; invalid rows go to ``report``."""
+    size = current_app.config["BULK_BATCH_SIZE"]
+    batch = []
+    for line_no, row, error in _iter_rows(stream, fmt):
+        if error is None:
+            try:
+                row = validate(row)
+            except (ValueError, TypeError) as exc:
+                error = str(exc) or "Invalid row"
+        if error is not None:
+            report(line_no, error)
+            continue
+        batch.append((line_no, row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _ImportResult:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def report(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "message": message})
+
+    def to_dict(self):
+        body = {"inserted": self.inserted, "failed": self.failed, "errors": self.errors}
+        if self.failed > len(self.errors):
+            body["errors_truncated"] = True
+        return body
+
+
+def _insert_rows(model, rows):
+    # multi-row INSERTs skip the ORM flush, so index the new rows for search explicitly
+    last_id = db.session.query(db.func.max(model.id)).scalar() or 0
+    db.session.execute(db.insert(model), rows)
+    index_new_rows(model, last_id)
+
+
+def _insert_batch(model, rows):
+    _insert_rows(model, rows)
+    db.session.commit()
+
+
+def _validate_equipment(row):
+    name, type_ = row.get("name"), row.get("type")
+    status = row.get("status") or "available"
+    if not all([name, type_]):
+        raise ValueError("Missing fields")
+    if status not in VALID_STATUSES:
+        raise ValueError("Invalid status")
+    return {"name": name, "type": type_, "status": status, "description": row.get("description")}
+
+
+def import_equipments(stream, fmt: str):
+    result = _ImportResult()
+    for batch in _batches(stream, fmt, _validate_equipment, result.report):
+        _insert_batch(Equipment, [row for _, row in batch])
+        result.inserted += len(batch)
+    invalidate_stats()
+    return result.to_dict(), 200
+
+
+def _validate_user(row):
+    name, email, password = row.get("name"), row.get("email"), row.get("password")
+    role = row.get("role") or "student"
+    if not all([name, email, password]):
+        raise ValueError("Missing fields")
+    if not all(isinstance(value, str) for value in (name, email, password)):
+        raise ValueError("name, email and password must be strings")
+    if role not in VALID_ROLES:
+        raise ValueError("Invalid role")
+    return {"name": name, "email": normalize_email(email), "password": password, "role": role}
+
+
+def _hash_all(passwords):
+    # Hashing dominates user imports. It shares the login hash pool (and its
+    # PASSWORD_HASH_WORKERS cap), so an import cannot starve logins.
+    # BULK_IMPORT_HASH_METHOD can be cheaper than PASSWORD_HASH_METHOD: login
+    # re-hashes with the full cost.
+    config = current_app.config
+    method = config["BULK_IMPORT_HASH_METHOD"] or config["PASSWORD_HASH_METHOD"]
+    return hash_passwords(passwords, method, config["PASSWORD_SALT_LENGTH"])
+
+
+def import_users(stream, fmt: str):
+    result = _ImportResult()
+    seen_emails = set()
+    for batch in _batches(stream, fmt, _validate_user, result.report):
+        # emails are stored normalized, so this is a seek on ix_users_email
+        emails = {row["email"] for _, row in batch}
+        existing = set(db.session.scalars(db.select(User.email).where(User.email.in_(emails))))
+
+        fresh = []
+        for line_no, row in batch:
+            email = row["email"]
+            if email in existing or email in seen_emails:
+                result.report(line_no, "Email already exists")
+                continue
+            seen_emails.add(email)
+            fresh.append((line_no, row))
+        if not fresh:
+            continue
+
+        for (_, row), hashed in zip(fresh, _hash_all([row["password"] for _, row in fresh])):
+            row["password"] = hashed
+        try:
+            _insert_batch(User, [row for _, row in fresh])
+        except IntegrityError:
+            # a concurrent registration or import took one of the emails
+            db.session.rollback()
+            for line_no, _ in fresh:
+                result.report(line_no, "Email already exists")
+            continue
+        result.inserted += len(fresh)
+    return result.to_dict(), 200
+
+
+def _validate_loan(row):
+    try:
+        user_id, equipment_id = int(row.get("user_id")), int(row.get("equipment_id"))
+    except (TypeError, ValueError):
+        raise ValueError("Missing or invalid user_id/equipment_id")
+    status = row.get("status") or "returned"
+    if status not in VALID_LOAN_STATUSES:
+        raise ValueError("Invalid status")
+    try:
+        loan_date = _parse_datetime(row.get("loan_date")) or datetime.utcnow()
+        start_date = _parse_datetime(row.get("start_date")) or loan_date
+        due_date = _parse_datetime(row.get("due_date"))
+        return_date = _parse_datetime(row.get("return_date"))
+    except ValueError:
+        raise ValueError("Invalid date")
+    if status in BOOKING_STATUSES:
+        # like loans created through the API, bookings always have a due date
+        due_date = due_date or default_due_date(start_date)
+    if due_date is not None and due_date <= start_date:
+        raise ValueError("due_date must be after start_date")
+    return {
+        "user_id": user_id,
+        "equipment_id": equipment_id,
+        "status": status,
+        "loan_date": loan_date,
+        "start_date": start_date,
+        "due_date": due_date,
+        "return_date": return_date,
+    }
+
+
+def _booked(bookings, start, end) -> bool:
+    """Whether a period ``[start, end)`` (``end`` None = still out) overlaps any of ``bookings``."""
+    return any(
+        (end is None or other_start < end) and (other_end is None or other_end > start)
+        for other_start, other_end in bookings
+    )
+
+
+def _check_bookings(rows, report, now):
+    """Drop the ``reserved``/``active`` rows that cannot book their equipment.
+
+    Their equipments are locked (in id order, like ``batch_transition``) and
+    every row goes through the checks of ``create_loan``: an active row needs
+    an available equipment, and no row may overlap an open booking, whether
+    it is already stored or accepted earlier in the file. Rows are
+    ``(line_no, row)``; the accepted ones are returned and the locked
+    equipments of active rows are marked loaned.
+    """
+    equipment_ids = sorted({row["equipment_id"] for _, row in rows if row["status"] in BOOKING_STATUSES})
+    if not equipment_ids:
+        return rows
+    equipments = {
+        equipment.id: equipment
+        for equipment in Equipment.query.filter(Equipment.id.in_(equipment_ids))
+        .order_by(Equipment.id)
+        .with_for_update()
+        .populate_existing()
+    }
+    bookings = {equipment_id: [] for equipment_id in equipment_ids}
+    stored = db.session.execute(
+        db.select(Loan.equipment_id, Loan.status, Loan.start_date, Loan.due_date).where(
+            Loan.equipment_id.in_(equipment_ids), Loan.status.in_(BOOKING_STATUSES)
+        )
+    )
+    for equipment_id, status, start_date, due_date in stored:
+        bookings[equipment_id].append((start_date, booking_end(status, due_date, now)))
+
+    accepted = []
+    for line_no, row in rows:
+        if row["status"] not in BOOKING_STATUSES:
+            accepted.append((line_no, row))
+            continue
+        equipment = equipments[row["equipment_id"]]
+        start, end = row["start_date"], booking_end(row["status"], row["due_date"], now)
+        if row["status"] == "active" and equipment.status not in {"available", "pending"}:
+            report(line_no, "Equipment not available")
+        elif _booked(bookings[equipment.id], start, end):
+            report(line_no, "Equipment is already booked for that period")
+        else:
+            bookings[equipment.id].append((start, end))
+            if row["status"] == "active":
+                equipment.status = "loaned"
+            accepted.append((line_no, row))
+    return accepted
+
+
+def import_loans(stream, fmt: str):
+    """Import loan history.
+
+    ``reserved`` and ``active`` rows book their equipment and are rejected
+    when it is not available or already booked for their period; accepted
+    active rows mark their equipment as loaned.
+    """
+    result = _ImportResult()
+    for batch in _batches(stream, fmt, _validate_loan, result.report):
+        user_ids = {row["user_id"] for _, row in batch}
+        equipment_ids = {row["equipment_id"] for _, row in batch}
+        known_users = set(db.session.scalars(db.select(User.id).where(User.id.in_(user_ids))))
+        known_equipments = set(db.session.scalars(db.select(Equipment.id).where(Equipment.id.in_(equipment_ids))))
+
+        known = []
+        for line_no, row in batch:
+            if row["user_id"] not in known_users:
+                result.report(line_no, "Unknown user_id")
+            elif row["equipment_id"] not in known_equipments:
+                result.report(line_no, "Unknown equipment_id")
+            else:
+                known.append((line_no, row))
+        valid = [row for _, row in _check_bookings(known, result.report, datetime.utcnow())]
+        if not valid:
+            db.session.rollback()
+            continue
+
+        _insert_rows(Loan, valid)
+        handed_out = [row for row in valid if row["status"] in HANDED_OUT_STATUSES]
+        if handed_out:
+            reconcile_counters(
+                user_ids=sorted({row["user_id"] for row in handed_out}),
+                equipment_ids=sorted({row["equipment_id"] for row in handed_out}),
+            )
+        db.session.commit()
+        result.inserted += len(valid)
+    invalidate_stats()
+    return result.to_dict(), 200
+
+
+def _export_source(kind: str):
+    if kind == "loans":
+        return Loan.listing_query().order_by(Loan.id), Loan.row_to_dict
+    model = {"equipments": Equipment, "users": User}[kind]
+    return model.query.order_by(model.id), lambda obj: obj.to_dict()
+
+
+def export_rows(kind: str, fmt: str):
+    """Return a generator that streams every row of ``kind`` as CSV or NDJSON."""
+    columns = EXPORT_COLUMNS[kind]
+
+    def records():
+        # Build the query only once the response starts streaming: the
+        # request's session is torn down when the view returns, and a query
+        # bound to it would silently reopen (and leak) a connection.
+        query, serialize = _export_source(kind)
+        for row in query.yield_per(current_app.config["BULK_BATCH_SIZE"]):
+            yield serialize(row)
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for i, record in enumerate(records(), start=1):
+            writer.writerow(record)
+            if i % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def generate_ndjson():
+        for record in records():
+            yield json.dumps(record, separators=(",", ":")) + "\n"
+
+    return generate_csv() if fmt == "csv" else generate_ndjson()
+
+
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def import_response(importer):
+    """Run ``importer`` on the current request body and build the JSON response."""
+    try:
+        fmt = resolve_format(request.mimetype, request.args.get("format"))
+    except BulkFormatError as exc:
+        return jsonify({"message": str(exc)}), 400
+    body, status_code = importer(request.stream, fmt)
+    return jsonify(body), status_code
+
+
+def export_response(kind: str):
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"message": "Unsupported format; use csv or ndjson"}), 400
+    return Response(
+        stream_with_context(export_rows(kind, fmt)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{fmt}"'},
+    )
@@ -1,16 +1,68 @@
 from backend import db
-from backend.models import Equipment
+from backend.models import Equipment, EquipmentUsageStats
+from backend.controllers.stats_controller import invalidate_stats
+from backend.utils.transactions import retry_on_conflict
+from backend.utils.search import filter_by_search
+from backend.utils.pagination import InvalidListArgument, apply_date_range, paginate, parse_int_arg
 
 
 VALID_STATUSES = {"available", "loaned", "under_maintenance", "pending"}
+# listing order; page cursors seek on the primary key
+EQUIPMENT_ORDER = [Equipment.id]
 
 
-def list_equipments(status: str | None = None):
+def filtered_equipments(args):
     query = Equipment.query
+
+    status = args.get("status")
     if status:
         query = query.filter_by(status=status)
-    equipments = query.all()
-    return {"equipments": [e.to_dict() for e in equipments]}, 200
+    type_ = args.get("type")
+    if type_:
+        query = query.filter_by(type=type_)
+    query = filter_by_search(query, "equipments", args, Equipment.name, Equipment.type, Equipment.description)
+    return apply_date_range(query, Equipment.created_at, args)
+
+
+def list_equipments(args=None):
+    args = args or {}
+    try:
+        query = filtered_equipments(args)
+        body = paginate(
+            query, EQUIPMENT_ORDER, args, lambda e: e.to_dict(), key="equipments", fields=Equipment.FIELDS
+        )
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+    return body, 200
+
+
+USAGE_ORDERINGS = {
+    "loans": EquipmentUsageStats.loan_count,
+    "hours": EquipmentUsageStats.total_loaned_hours,
+}
+
+
+def equipment_usage(args=None):
+    """Most used equipments by ``?order=loans|hours`` (top ``?limit=``, default 10, max 100)."""
+    args = args or {}
+    order = args.get("order", "loans")
+    if order not in USAGE_ORDERINGS:
+        return {"message": "Invalid order; use loans or hours"}, 400
+    try:
+        limit = min(max(parse_int_arg(args, "limit") or 10, 1), 100)
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+
+    rows = (
+        db.session.query(EquipmentUsageStats, Equipment.name, Equipment.type)
+        .join(Equipment, Equipment.id == EquipmentUsageStats.equipment_id)
+        .order_by(USAGE_ORDERINGS[order].desc(), EquipmentUsageStats.equipment_id)
+        .limit(limit)
+        .all()
+    )
+    return {
+        "equipments": [{**stats.to_dict(), "name": name, "type": type_} for stats, name, type_ in rows]
+    }, 200
 
 
 def get_equipment(equipment_id: int):
@@ -32,10 +84,12 @@ def create_equipment(data):
     equipment = Equipment(name=name, type=type_, status=status, description=description)
     db.session.add(equipment)
     db.session.commit()
+    invalidate_stats()
 
     return {"equipment": equipment.to_dict()}, 201
 
 
+@retry_on_conflict
 def update_equipment(equipment_id: int, data):
     equipment = Equipment.query.get_or_404(equipment_id)
 
@@ -49,11 +103,14 @@ def update_equipment(equipment_id: int, data):
     equipment.description = data.get("description", equipment.description)
 
     db.session.commit()
+    invalidate_stats()
     return {"equipment": equipment.to_dict()}, 200
 
 
+@retry_on_conflict
 def delete_equipment(equipment_id: int):
     equipment = Equipment.query.get_or_404(equipment_id)
     db.session.delete(equipment)
     db.session.commit()
+    invalidate_stats()
     return {"message": "Equipment deleted"}, 200
@@ -1,39 +1,181 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from flask import g
+from flask import abort, current_app, g
 
 from backend import db
-from backend.models import Loan, Equipment, Alert
-
-
-def list_loans():
-    loans = Loan.query.all()
-    return {"loans": [l.to_dict() for l in loans]}, 200
+from backend.models import Loan, Equipment, Alert, User, ArchivedLoan
+from backend.controllers.stats_controller import invalidate_stats
+from backend.controllers.reservation_controller import find_conflict
+from backend.utils.transactions import get_for_update_or_404, retry_on_conflict
+from backend.utils.search import filter_by_search
+from backend.utils.usage_counters import (
+    lock_active_loan_count,
+    record_loan_removed,
+    record_loan_returned,
+    record_loan_started,
+)
+from backend.utils.pagination import (
+    InvalidListArgument,
+    apply_date_range,
+    apply_search,
+    paginate,
+    parse_datetime_arg,
+    parse_int_arg,
+)
+
+
+# pending -> active (approved) -> returned / rejected / cancelled;
+# approved future bookings are reserved until they start
+VALID_LOAN_STATUSES = {"pending", "reserved", "active", "returned", "rejected", "cancelled"}
+# listing order (newest first); the id makes page cursors unique
+LOAN_ORDER = [Loan.loan_date, Loan.id]
+
+
+def _filter_loans(query, model, args):
+    status = args.get("status")
+    if status:
+        query = query.filter(model.status == status)
+    user_id = parse_int_arg(args, "user_id")
+    if user_id is not None:
+        query = query.filter(model.user_id == user_id)
+    equipment_id = parse_int_arg(args, "equipment_id")
+    if equipment_id is not None:
+        query = query.filter(model.equipment_id == equipment_id)
+    return apply_date_range(query, model.loan_date, args)
+
+
+def _include_archive(args) -> bool:
+    return (args.get("include_archive") or "").lower() in {"1", "true", "yes"}
+
+
+def _filtered_loans(args, owner_id: int = None):
+    """Loan listing rows, plus archived loans (``UNION ALL``) with ``?include_archive=true``."""
+    query = _filter_loans(Loan.listing_query(), Loan, args)
+    if owner_id is not None:
+        query = query.filter(Loan.user_id == owner_id)
+    query = filter_by_search(query, "loans", args, User.name, User.email, Equipment.name)
+    if not _include_archive(args):
+        return query
+
+    # archived loans are not in the search index
+    archived = _filter_loans(ArchivedLoan.listing_query(), ArchivedLoan, args)
+    if owner_id is not None:
+        archived = archived.filter(ArchivedLoan.user_id == owner_id)
+    archived = apply_search(archived, args, User.name, User.email, Equipment.name)
+    # ordering and cursor filters on Loan columns are adapted to the union
+    return query.union_all(archived)
+
+
+def default_due_date(start: datetime = None) -> datetime:
+    days = current_app.config.get("LOAN_DURATION_DAYS", 7)
+    return (start or datetime.utcnow()) + timedelta(days=days)
+
+
+def _is_reservation(loan) -> bool:
+    # immediate loans start when they are created
+    return bool(loan.start_date and loan.loan_date and loan.start_date > loan.loan_date)
+
+
+def _conflict_response(conflict):
+    return {
+        "message": "Equipment is already booked for that period",
+        "conflict": {
+            "loan_id": conflict.id,
+            "start_date": conflict.start_date.isoformat() if conflict.start_date else None,
+            "due_date": conflict.due_date.isoformat() if conflict.due_date else None,
+        },
+    }, 409
+
+
+def _over_loan_limit(user_id):
+    limit = current_app.config["MAX_ACTIVE_LOANS_PER_USER"]
+    if limit and lock_active_loan_count(user_id) >= limit:
+        return {"message": f"User already has {limit} active loans"}, 400
+    return None
+
+
+def _release_pending_equipment(loan, equipment):
+    # An immediate request marked the equipment pending; free it again.
+    if not _is_reservation(loan) and equipment.status == "pending":
+        equipment.status = "available"
 
 
-def list_my_loans():
+def list_loans(args=None):
+    args = args or {}
+    try:
+        body = paginate(
+            _filtered_loans(args),
+            LOAN_ORDER,
+            args,
+            Loan.row_to_dict,
+            key="loans",
+            descending=True,
+            fields=Loan.FIELDS,
+        )
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+    return body, 200
+
+
+def list_my_loans(args=None):
     user = getattr(g, "current_user", None)
     if not user:
         return {"message": "Unauthorized"}, 401
-    loans = Loan.query.filter_by(user_id=user.id).order_by(Loan.loan_date.desc()).all()
-    return {"loans": [l.to_dict() for l in loans]}, 200
+    args = args or {}
+    try:
+        query = _filtered_loans(args, owner_id=user.id)
+        body = paginate(
+            query,
+            LOAN_ORDER,
+            args,
+            Loan.row_to_dict,
+            key="loans",
+            descending=True,
+            fields=Loan.FIELDS,
+        )
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+    return body, 200
 
 
 def get_loan(loan_id: int):
-    loan = Loan.query.get_or_404(loan_id)
-    return {"loan": loan.to_dict()}, 200
+    loan = db.session.get(Loan, loan_id)
+    if loan is not None:
+        return {"loan": loan.to_dict()}, 200
+    archived = ArchivedLoan.listing_query().filter(ArchivedLoan.id == loan_id).first()
+    if archived is None:
+        abort(404)
+    return {"loan": ArchivedLoan.row_to_dict(archived), "archived": True}, 200
 
 
+@retry_on_conflict
 def create_loan(data):
     user_id = data.get("user_id")
     equipment_id = data.get("equipment_id")
 
     if not all([user_id, equipment_id]):
         return {"message": "Missing fields"}, 400
-
-    equipment = Equipment.query.get_or_404(equipment_id)
-    if equipment.status not in {"available", "pending"}:
+    try:
+        start_date = parse_datetime_arg(data, "start_date")
+        due_date = parse_datetime_arg(data, "due_date")
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+
+    # A start_date in the future books the equipment ahead (a reservation);
+    # otherwise the loan starts now.
+    now = datetime.utcnow()
+    reservation = start_date is not None and start_date > now
+    if not reservation:
+        start_date = now
+    if due_date is not None and due_date <= start_date:
+        return {"message": "due_date must be after start_date"}, 400
+
+    equipment = get_for_update_or_404(Equipment, equipment_id)
+    if not reservation and equipment.status not in {"available", "pending"}:
         return {"message": "Equipment not available"}, 400
+    conflict = find_conflict(equipment.id, start_date, due_date or default_due_date(start_date))
+    if conflict:
+        return _conflict_response(conflict)
 
     # Teachers and students create "loan requests" that start as pending.
     # Admins can create immediate active loans that reserve the equipment.
@@ -41,75 +183,228 @@ def create_loan(data):
 
     if role in {"teacher", "student"}:
         status = "pending"
-        equipment.status = "pending"
+        if not reservation:
+            equipment.status = "pending"
     else:
-        status = "active"
-        equipment.status = "loaned"
-
-    loan = Loan(user_id=user_id, equipment_id=equipment_id, status=status)
+        status = "reserved" if reservation else "active"
+        if not reservation:
+            limited = _over_loan_limit(user_id)
+            if limited:
+                return limited
+            equipment.status = "loaned"
+        due_date = due_date or default_due_date(start_date)
+
+    loan = Loan(
+        user_id=user_id,
+        equipment_id=equipment_id,
+        status=status,
+        loan_date=now,
+        start_date=start_date,
+        due_date=due_date,
+    )
 
     db.session.add(loan)
+    if status == "active":
+        record_loan_started(loan)
     db.session.commit()
+    invalidate_stats()
 
     return {"loan": loan.to_dict()}, 201
 
 
-def approve_loan(loan_id: int):
-    loan = Loan.query.get_or_404(loan_id)
-    equipment = Equipment.query.get_or_404(loan.equipment_id)
-
-    if loan.status != "pending":
-        return {"message": "Only pending loans can be approved"}, 400
-    if equipment.status not in {"available", "pending"}:
-        return {"message": "Equipment is not available"}, 400
-
-    loan.status = "active"
-    loan.loan_date = loan.loan_date or datetime.utcnow()
-    equipment.status = "loaned"
+def _approve(loan, equipment, now):
+    """Approve a pending request, or hand out a reservation whose start has come.
 
-    db.session.commit()
-    return {"loan": loan.to_dict()}, 200
+    Transition helpers change the locked ``loan``/``equipment`` in place and
+    return None, or an error ``(body, status)``; callers commit.
+    """
+    if loan.status not in {"pending", "reserved"}:
+        return {"message": "Only pending or reserved loans can be approved"}, 400
 
+    start = loan.start_date or now
+    if start > now:
+        if loan.status == "reserved":
+            return {"message": "Reservation has not started yet"}, 400
+        status, due_date = "reserved", loan.due_date or default_due_date(start)
+    else:
+        if equipment.status not in {"available", "pending"}:
+            return {"message": "Equipment is not available"}, 400
+        limited = _over_loan_limit(loan.user_id)
+        if limited:
+            return limited
+        status, due_date = "active", loan.due_date or default_due_date(now)
+
+    conflict = find_conflict(equipment.id, max(start, now), due_date, exclude_id=loan.id)
+    if conflict:
+        return _conflict_response(conflict)
+
+    loan.status = status
+    loan.loan_date = loan.loan_date or now
+    loan.due_date = due_date
+    if status == "active":
+        equipment.status = "loaned"
+        record_loan_started(loan)
+    return None
 
-def reject_loan(loan_id: int):
-    loan = Loan.query.get_or_404(loan_id)
 
+def _reject(loan, equipment, now):
     if loan.status != "pending":
         return {"message": "Only pending loans can be rejected"}, 400
-
     loan.status = "rejected"
-
-    # When a pending request is rejected, free the equipment again.
-    equipment = Equipment.query.get(loan.equipment_id)
-    if equipment and equipment.status == "pending":
-        equipment.status = "available"
-
-    db.session.commit()
-    return {"loan": loan.to_dict()}, 200
+    _release_pending_equipment(loan, equipment)
+    return None
 
 
-def close_loan(loan_id: int, create_alert: bool = True):
-    loan = Loan.query.get_or_404(loan_id)
-    equipment = Equipment.query.get_or_404(loan.equipment_id)
-
+def _close(loan, equipment, now, create_alert: bool = True):
     if loan.status != "active":
         return {"message": "Loan is not active"}, 400
 
     loan.status = "returned"
-    loan.return_date = datetime.utcnow()
+    loan.return_date = now
     equipment.status = "available"
+    record_loan_returned(loan)
 
     # Example: create an informational alert when a loan is closed
     if create_alert:
         alert = Alert(loan_id=loan.id, alert_type="returned")
         db.session.add(alert)
+    return None
+
+
+def _transition(loan_id: int, apply, **kwargs):
+    loan = get_for_update_or_404(Loan, loan_id)
+    equipment = get_for_update_or_404(Equipment, loan.equipment_id)
+
+    error = apply(loan, equipment, datetime.utcnow(), **kwargs)
+    if error:
+        return error
 
     db.session.commit()
+    invalidate_stats()
     return {"loan": loan.to_dict()}, 200
 
 
+@retry_on_conflict
+def approve_loan(loan_id: int):
+    return _transition(loan_id, _approve)
+
+
+@retry_on_conflict
+def reject_loan(loan_id: int):
+    return _transition(loan_id, _reject)
+
+
+@retry_on_conflict
+def cancel_loan(loan_id: int):
+    """Withdraw a pending request or a reservation (the borrower or an admin)."""
+    loan = get_for_update_or_404(Loan, loan_id)
+    user = getattr(g, "current_user", None)
+    if not user:
+        return {"message": "Unauthorized"}, 401
+    if user.role != "admin" and loan.user_id != user.id:
+        return {"message": "Forbidden"}, 403
+
+    if loan.status not in {"pending", "reserved"}:
+        return {"message": "Only pending or reserved loans can be cancelled"}, 400
+
+    loan.status = "cancelled"
+    _release_pending_equipment(loan, get_for_update_or_404(Equipment, loan.equipment_id))
+
+    db.session.commit()
+    invalidate_stats()
+    return {"loan": loan.to_dict()}, 200
+
+
+@retry_on_conflict
+def close_loan(loan_id: int, create_alert: bool = True):
+    return _transition(loan_id, _close, create_alert=create_alert)
+
+
+BATCH_ACTIONS = {"approve": _approve, "reject": _reject, "close": _close}
+MAX_BATCH_SIZE = 500
+
+
+def _parse_batch_ids(data):
+    ids = data.get("ids")
+    if not isinstance(ids, list) or not ids:
+        raise ValueError("ids must be a non-empty list of loan ids")
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} ids per request")
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError("ids must be integers")
+    return list(dict.fromkeys(ids))
+
+
+@retry_on_conflict
+def batch_transition(action: str, data):
+    """Apply ``action`` to every loan in ``data["ids"]`` in one transaction.
+
+    Loans and their equipments are locked with two ``WHERE id IN`` loads (in
+    id order, like the single-loan transitions), each loan goes through the
+    same checks as its single endpoint, and one commit stores every success.
+    Failed ids are reported and left unchanged; they do not undo the others.
+    """
+    apply = BATCH_ACTIONS.get(action)
+    if apply is None:
+        return {"message": f"Unknown action; use one of {', '.join(BATCH_ACTIONS)}"}, 404
+    try:
+        ids = _parse_batch_ids(data)
+    except ValueError as exc:
+        return {"message": str(exc)}, 400
+
+    loans = {
+        loan.id: loan
+        for loan in Loan.query.filter(Loan.id.in_(ids))
+        .order_by(Loan.id)
+        .with_for_update()
+        .populate_existing()
+    }
+    equipment_ids = sorted({loan.equipment_id for loan in loans.values()})
+    equipments = {
+        equipment.id: equipment
+        for equipment in Equipment.query.filter(Equipment.id.in_(equipment_ids))
+        .order_by(Equipment.id)
+        .with_for_update()
+        .populate_existing()
+    }
+
+    now = datetime.utcnow()
+    results = []
+    changed_equipments = set()
+    # Conflict checks query the database; autoflushing before each one would
+    # write the batch row by row. Flush only when an earlier loan of the batch
+    # changed the same equipment, so its booking is visible.
+    with db.session.no_autoflush:
+        for loan_id in ids:
+            loan = loans.get(loan_id)
+            if loan is None:
+                results.append({"id": loan_id, "ok": False, "error": 404, "message": "Loan not found"})
+                continue
+            if loan.equipment_id in changed_equipments:
+                db.session.flush()
+                changed_equipments.clear()
+            error = apply(loan, equipments[loan.equipment_id], now)
+            if error:
+                body, status_code = error
+                results.append({"id": loan_id, "ok": False, "error": status_code, **body})
+            else:
+                changed_equipments.add(loan.equipment_id)
+                results.append({"id": loan_id, "ok": True, "status": loan.status})
+
+    succeeded = sum(1 for result in results if result["ok"])
+    if succeeded:
+        db.session.commit()
+        invalidate_stats()
+    else:
+        db.session.rollback()
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}, 200
+
+
+@retry_on_conflict
 def delete_loan(loan_id: int):
     loan = Loan.query.get_or_404(loan_id)
+    record_loan_removed(loan)
     db.session.delete(loan)
     db.session.commit()
+    invalidate_stats()
     return {"message": "Loan deleted"}, 200
@@ -0,0 +1,136 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+from backend import db
+from backend.models import LoanDailyRollup
+from backend.utils.pagination import InvalidListArgument, parse_datetime_arg
+
+
+DEFAULT_REPORT_DAYS = 30
+MAX_REPORT_DAYS = 731
+INTERVALS = ("day", "week", "month", "total")
+
+# keys of each report row, in order (also the CSV header)
+REPORT_COLUMNS = (
+    "period",
+    "equipment_type",
+    "loans",
+    "returns",
+    "loaned_hours",
+    "average_loan_hours",
+    "overdue_returns",
+    "overdue_rate",
+)
+
+
+def _window(args):
+    """Whole days [first, end) covered by ``?from=``/``?to=`` (default: the last 30 days)."""
+    start = parse_datetime_arg(args, "from")
+    end = parse_datetime_arg(args, "to", end_of_day=True)
+    if end is None:
+        end_day = datetime.utcnow().date() + timedelta(days=1)
+    else:
+        # a bound inside a day still includes that day
+        end_day = end.date() + timedelta(days=1 if end.time() != datetime.min.time() else 0)
+    first_day = start.date() if start else end_day - timedelta(days=DEFAULT_REPORT_DAYS)
+    if first_day >= end_day:
+        raise InvalidListArgument("from must be before to")
+    if (end_day - first_day).days > MAX_REPORT_DAYS:
+        raise InvalidListArgument(f"Range is limited to {MAX_REPORT_DAYS} days")
+    return first_day, end_day
+
+
+def _period(day, interval: str, first_day):
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    if interval == "total":
+        return first_day
+    return day
+
+
+def _metrics(totals: dict) -> dict:
+    returns = totals["returns"]
+    return {
+        "loans": totals["loans"],
+        "returns": returns,
+        "loaned_hours": round(totals["loaned_hours"], 2),
+        "average_loan_hours": round(totals["loaned_hours"] / returns, 2) if returns else None,
+        "overdue_returns": totals["overdue_returns"],
+        "overdue_rate": round(totals["overdue_returns"] / returns, 4) if returns else None,
+    }
+
+
+def _empty():
+    return {"loans": 0, "returns": 0, "loaned_hours": 0.0, "overdue_returns": 0}
+
+
+def _accumulate(totals: dict, row):
+    totals["loans"] += row.loans
+    totals["returns"] += row.returns
+    totals["loaned_hours"] += row.loaned_hours
+    totals["overdue_returns"] += row.overdue_returns
+
+
+def report_query(first_day, end_day, equipment_type: str = None):
+    """Rollup rows of the days [first_day, end_day), optionally of one equipment type."""
+    query = db.session.query(
+        LoanDailyRollup.day,
+        LoanDailyRollup.equipment_type,
+        LoanDailyRollup.loans,
+        LoanDailyRollup.returns,
+        LoanDailyRollup.loaned_hours,
+        LoanDailyRollup.overdue_returns,
+        LoanDailyRollup.refreshed_at,
+    ).filter(LoanDailyRollup.day >= first_day, LoanDailyRollup.day < end_day)
+    if equipment_type:
+        query = query.filter(LoanDailyRollup.equipment_type == equipment_type)
+    return query.order_by(LoanDailyRollup.day, LoanDailyRollup.equipment_type)
+
+
+def loan_report(args=None):
+    """Loans, returns, average loan duration and overdue rate per period and equipment type.
+
+    Answered from ``loan_daily_rollups`` only (at most ``MAX_REPORT_DAYS`` x
+    equipment types rows), never from the loans themselves.
+    """
+    args = args or {}
+    interval = args.get("interval") or "day"
+    if interval not in INTERVALS:
+        return {"message": f"interval must be one of {', '.join(INTERVALS)}"}, 400
+    try:
+        first_day, end_day = _window(args)
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+
+    groups = {}
+    overall = _empty()
+    refreshed_at = None
+    for row in report_query(first_day, end_day, args.get("type")):
+        key = (_period(row.day, interval, first_day), row.equipment_type)
+        _accumulate(groups.setdefault(key, _empty()), row)
+        _accumulate(overall, row)
+        if refreshed_at is None or row.refreshed_at > refreshed_at:
+            refreshed_at = row.refreshed_at
+
+    return {
+        "from": first_day.isoformat(),
+        "to": end_day.isoformat(),
+        "interval": interval,
+        "rows": [
+            {"period": period.isoformat(), "equipment_type": equipment_type, **_metrics(totals)}
+            for (period, equipment_type), totals in sorted(groups.items())
+        ],
+        "totals": _metrics(overall),
+        "refreshed_at": refreshed_at.isoformat() if refreshed_at else None,
+    }, 200
+
+
+def report_csv(body: dict) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(body["rows"])
+    return buffer.getvalue()
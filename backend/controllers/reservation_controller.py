@@ -0,0 +1,154 @@
+"""Booking conflicts and free slots.
+
+A loan books its equipment for ``[start_date, due_date)`` once it is approved
+(``reserved`` for future bookings, then ``active``); an active loan that is
+past its due date (or has none) is still out, so it holds the equipment until
+it is returned. Both questions below seek ``ix_loans_equipment_id_status_due_date``
+on the equipment and the two booking statuses, so closed history is never
+read; the few open bookings found are filtered on the window and sorted.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+from backend import db
+from backend.models import Equipment, Loan
+from backend.utils.pagination import InvalidListArgument, parse_datetime_arg
+
+
+# statuses whose period blocks other bookings of the equipment
+BOOKING_STATUSES = ("reserved", "active")
+MAX_AVAILABILITY_EQUIPMENTS = 100
+MAX_AVAILABILITY_DAYS = 92
+DEFAULT_AVAILABILITY_DAYS = 7
+
+
+def _overlaps(start: datetime, end: datetime, now: datetime = None):
+    now = now or datetime.utcnow()
+    return and_(
+        Loan.status.in_(BOOKING_STATUSES),
+        or_(
+            Loan.due_date > start,
+            and_(Loan.status == "active", or_(Loan.due_date.is_(None), Loan.due_date <= now)),
+        ),
+        Loan.start_date < end,
+    )
+
+
+def booking_end(status: str, due_date, now: datetime):
+    """When a booking frees its equipment; None while an overdue active loan is still out."""
+    if status == "active" and (due_date is None or due_date <= now):
+        return None
+    return due_date
+
+
+def conflict_query(equipment_id: int, start: datetime, end: datetime, exclude_id: int = None):
+    query = Loan.query.filter(Loan.equipment_id == equipment_id, _overlaps(start, end))
+    if exclude_id is not None:
+        query = query.filter(Loan.id != exclude_id)
+    return query.order_by(Loan.start_date)
+
+
+def find_conflict(equipment_id: int, start: datetime, end: datetime, exclude_id: int = None):
+    """The first booking of ``equipment_id`` overlapping ``[start, end)``, or None."""
+    return conflict_query(equipment_id, start, end, exclude_id).first()
+
+
+def _parse_ids(value):
+    try:
+        ids = sorted({int(part) for part in (value or "").split(",") if part.strip()})
+    except ValueError:
+        raise InvalidListArgument("Invalid ids")
+    if not ids:
+        raise InvalidListArgument("Missing ids")
+    if len(ids) > MAX_AVAILABILITY_EQUIPMENTS:
+        raise InvalidListArgument(f"At most {MAX_AVAILABILITY_EQUIPMENTS} ids")
+    return ids
+
+
+def _window(args):
+    start = parse_datetime_arg(args, "from") or datetime.utcnow()
+    end = parse_datetime_arg(args, "to", end_of_day=True) or start + timedelta(days=DEFAULT_AVAILABILITY_DAYS)
+    if end <= start:
+        raise InvalidListArgument("to must be after from")
+    if end - start > timedelta(days=MAX_AVAILABILITY_DAYS):
+        raise InvalidListArgument(f"Range is limited to {MAX_AVAILABILITY_DAYS} days")
+    return start, end
+
+
+def _free_slots(busy, start: datetime, end: datetime):
+    """Gaps of ``[start, end)`` not covered by ``busy`` (sorted by start)."""
+    slots = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            slots.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            return slots
+    if cursor < end:
+        slots.append((cursor, end))
+    return slots
+
+
+def _period(start, end):
+    return {"start": start.isoformat(), "end": end.isoformat()}
+
+
+def availability_query(ids, start: datetime, end: datetime):
+    """Every equipment of ``ids``, with its bookings overlapping ``[start, end)`` if any."""
+    return (
+        db.session.query(
+            Equipment.id,
+            Equipment.name,
+            Equipment.status,
+            Loan.id.label("loan_id"),
+            Loan.status.label("loan_status"),
+            Loan.start_date,
+            Loan.due_date,
+        )
+        .outerjoin(Loan, and_(Loan.equipment_id == Equipment.id, _overlaps(start, end)))
+        .filter(Equipment.id.in_(ids))
+        .order_by(Equipment.id, Loan.start_date)
+    )
+
+
+def equipment_availability(args=None):
+    """Bookings and free slots of ``?ids=`` between ``?from=`` and ``?to=`` (default: next 7 days)."""
+    args = args or {}
+    try:
+        ids = _parse_ids(args.get("ids"))
+        start, end = _window(args)
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+
+    now = datetime.utcnow()
+    equipments = {}
+    for row in availability_query(ids, start, end):
+        entry = equipments.get(row.id)
+        if entry is None:
+            entry = equipments[row.id] = {"equipment_id": row.id, "name": row.name, "status": row.status, "busy": []}
+        if row.loan_id is not None:
+            busy_end = booking_end(row.loan_status, row.due_date, now) or end
+            entry["busy"].append((row.loan_id, row.loan_status, max(row.start_date, start), min(busy_end, end)))
+
+    result = []
+    for entry in equipments.values():
+        busy = entry.pop("busy")
+        if entry["status"] == "under_maintenance":
+            free = []
+        else:
+            free = _free_slots([(b_start, b_end) for _, _, b_start, b_end in busy], start, end)
+        entry["bookings"] = [
+            {"loan_id": loan_id, "status": status, **_period(b_start, b_end)}
+            for loan_id, status, b_start, b_end in busy
+        ]
+        entry["free"] = [_period(s, e) for s, e in free]
+        result.append(entry)
+
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "equipments": result,
+        "missing_ids": [i for i in ids if i not in equipments],
+    }, 200
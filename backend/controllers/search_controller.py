@@ -0,0 +1,81 @@
+from flask import g
+from sqlalchemy import select
+
+from backend import db
+from backend.models import Equipment, Loan, User
+from backend.utils.pagination import InvalidListArgument, parse_int_arg
+from backend.utils.search import KIND_MODELS, filter_by_search, matches, supported
+
+
+DEFAULT_RESULTS = 10
+MAX_RESULTS = 50
+# Kinds each role may search; non-admins only see their own loans
+ROLE_KINDS = {
+    "admin": ("loans", "users", "equipments"),
+    "teacher": ("loans", "equipments"),
+    "student": ("loans", "equipments"),
+}
+FALLBACK_COLUMNS = {
+    "users": (User.name, User.email),
+    "equipments": (Equipment.name, Equipment.type, Equipment.description),
+    "loans": (User.name, User.email, Equipment.name),
+}
+
+
+def _ranked_ids(kind, term, within, limit):
+    if supported():
+        query = matches(kind, term, within=within, limit=limit)
+        if query is None:
+            return []
+        return [row.ref_id for row in db.session.execute(query)]
+
+    # No index on this database: LIKE filter, newest first
+    model = KIND_MODELS[kind]
+    query = db.session.query(model.id)
+    if kind == "loans":
+        query = query.outerjoin(User, User.id == Loan.user_id).outerjoin(
+            Equipment, Equipment.id == Loan.equipment_id
+        )
+    if within is not None:
+        query = query.filter(model.id.in_(within))
+    query = filter_by_search(query, kind, {"q": term}, *FALLBACK_COLUMNS[kind])
+    return [row.id for row in query.order_by(model.id.desc()).limit(limit)]
+
+
+def _load(kind, ids):
+    if not ids:
+        return []
+    if kind == "loans":
+        rows = Loan.listing_query().filter(Loan.id.in_(ids)).all()
+        by_id = {row.id: Loan.row_to_dict(row) for row in rows}
+    else:
+        model = KIND_MODELS[kind]
+        by_id = {obj.id: obj.to_dict() for obj in model.query.filter(model.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def search(args):
+    term = (args.get("q") or "").strip()
+    if not term:
+        return {"message": "Missing q"}, 400
+    try:
+        limit = parse_int_arg(args, "limit") or DEFAULT_RESULTS
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    user = g.current_user
+    allowed = ROLE_KINDS.get(user.role, ())
+    requested = [k.strip() for k in (args.get("type") or "").split(",") if k.strip()]
+    unknown = [k for k in requested if k not in KIND_MODELS]
+    if unknown:
+        return {"message": f"Unknown type: {unknown[0]}"}, 400
+    kinds = [k for k in (requested or allowed) if k in allowed]
+
+    results = {}
+    for kind in kinds:
+        within = None
+        if kind == "loans" and user.role != "admin":
+            within = select(Loan.id).where(Loan.user_id == user.id)
+        results[kind] = _load(kind, _ranked_ids(kind, term, within, limit))
+    return {"query": term, "results": results}, 200
@@ -0,0 +1,53 @@
+from flask import current_app
+
+from backend import db
+from backend.models import Equipment, Loan
+from backend.utils.cache import TTLCache
+
+
+# Dashboard numbers are read far more often than loans/equipments change,
+# so keep the aggregate for a few seconds and drop it on every mutation.
+stats_cache = TTLCache(maxsize=16)
+
+
+def invalidate_stats():
+    stats_cache.clear()
+
+
+def _count_by_status(model):
+    rows = db.session.query(model.status, db.func.count(model.id)).group_by(model.status).all()
+    return {status: count for status, count in rows}
+
+
+def recent_pending_query(limit: int):
+    return (
+        Loan.listing_query()
+        .filter(Loan.status == "pending")
+        .order_by(Loan.loan_date.desc(), Loan.id.desc())
+        .limit(limit)
+    )
+
+
+def get_stats(pending_limit: int = 5):
+    pending_limit = max(0, min(pending_limit, 50))
+    cached = stats_cache.get(pending_limit)
+    if cached is not None:
+        return cached, 200
+
+    equipment_counts = _count_by_status(Equipment)
+    loan_counts = _count_by_status(Loan)
+    recent_pending = recent_pending_query(pending_limit).all()
+
+    body = {
+        "equipments": {
+            "total": sum(equipment_counts.values()),
+            "by_status": equipment_counts,
+        },
+        "loans": {
+            "total": sum(loan_counts.values()),
+            "by_status": loan_counts,
+        },
+        "recent_pending": [Loan.row_to_dict(r) for r in recent_pending],
+    }
+    stats_cache.set(pending_limit, body, ttl=current_app.config["STATS_CACHE_TTL"])
+    return body, 200
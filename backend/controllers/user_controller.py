@@ -1,10 +1,26 @@
+from flask import g
+
 from backend import db
-from backend.models import User
+from backend.models import User, UserLoanStats, normalize_email
+from backend.utils.search import filter_by_search
+from backend.utils.pagination import InvalidListArgument, apply_date_range, paginate
+
 
+def list_users(args=None):
+    args = args or {}
+    query = User.query
 
-def list_users():
-    users = User.query.all()
-    return {"users": [u.to_dict() for u in users]}, 200
+    role = args.get("role")
+    if role:
+        query = query.filter(User.role == role)
+    query = filter_by_search(query, "users", args, User.name, User.email)
+
+    try:
+        query = apply_date_range(query, User.created_at, args)
+        body = paginate(query, [User.id], args, lambda u: u.to_dict(), key="users", fields=User.FIELDS)
+    except InvalidListArgument as exc:
+        return {"message": str(exc)}, 400
+    return body, 200
 
 
 def get_user(user_id: int):
@@ -12,8 +28,20 @@ def get_user(user_id: int):
     return {"user": user.to_dict()}, 200
 
 
+def get_user_loan_stats(user_id: int):
+    """Loan counters of a user: one primary-key lookup (zeros if they never borrowed)."""
+    user = getattr(g, "current_user", None)
+    if not user or (user.role != "admin" and user.id != user_id):
+        return {"message": "Forbidden"}, 403
+    User.query.get_or_404(user_id)
+    stats = db.session.get(UserLoanStats, user_id) or UserLoanStats(
+        user_id=user_id, active_loans=0, total_loans=0
+    )
+    return {"stats": stats.to_dict()}, 200
+
+
 def create_user(data):
-    from .auth_controller import hash_password  # avoid circular import
+    from .auth_controller import hash_password, PasswordHashBusy  # avoid circular import
 
     name = data.get("name")
     email = data.get("email")
@@ -23,10 +51,15 @@ def create_user(data):
     if not all([name, email, password]):
         return {"message": "Missing fields"}, 400
 
-    if User.query.filter_by(email=email).first():
+    if User.query.filter_by(email=normalize_email(email)).first():
         return {"message": "Email already exists"}, 400
 
-    user = User(name=name, email=email, password=hash_password(password), role=role)
+    try:
+        password_hash = hash_password(password)
+    except PasswordHashBusy:
+        return {"message": "Server busy, try again later"}, 503
+
+    user = User(name=name, email=email, password=password_hash, role=role)
     db.session.add(user)
     db.session.commit()
 
@@ -34,6 +67,8 @@ def create_user(data):
 
 
 def update_user(user_id: int, data):
+    from .auth_controller import invalidate_principal  # avoid circular import
+
     user = User.query.get_or_404(user_id)
 
     user.name = data.get("name", user.name)
@@ -41,11 +76,15 @@ def update_user(user_id: int, data):
     user.role = data.get("role", user.role)
 
     db.session.commit()
+    invalidate_principal(user.id)
     return {"user": user.to_dict()}, 200
 
 
 def delete_user(user_id: int):
+    from .auth_controller import invalidate_principal  # avoid circular import
+
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_principal(user_id)
     return {"message": "User deleted"}, 200
@@ -0,0 +1,35 @@
+"""Gunicorn settings: ``gunicorn -c backend/gunicorn.conf.py backend.wsgi:app`` (from the repo root).
+
+Each worker is a separate process with its own DB pool and in-process caches.
+A request holds one pooled connection while it runs, so keep
+WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below MySQL's max_connections.
+With gthread workers, keep DB_POOL_SIZE >= WEB_THREADS; gevent workers run
+many more requests at once and queue for a connection (DB_POOL_TIMEOUT).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+# Every open /api/events stream occupies its connection for up to
+# EVENTS_STREAM_SECONDS: with gthread, a few listeners would take every thread
+# and starve the API, so when events are on the default is gevent, where an
+# idle stream is just a parked greenlet. gthread (threads overlap requests
+# blocked on MySQL or password hashing) remains for EVENTS_ENABLED=false.
+events_enabled = os.getenv("EVENTS_ENABLED", "true").lower() == "true"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS") or ("gevent" if events_enabled else "gthread")
+threads = int(os.getenv("WEB_THREADS", "4"))
+# gevent only: open connections (streams included) per worker
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+# Streamed exports and list responses can legitimately run for a while
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers periodically to bound memory growth of long-lived processes
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+accesslog = "-"
+# gunicorn's default format with the path in place of the request line (%(r)s),
+# so query strings such as /api/events?ticket= stay out of the logs
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = "-"
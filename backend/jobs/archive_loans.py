@@ -0,0 +1,93 @@
+"""Move old closed loans and their alerts into the archive tables.
+
+Returned, rejected and cancelled loans whose loan (and return) date is older
+than ``LOAN_ARCHIVE_AFTER_DAYS`` are copied to ``loans_archive`` with
+``INSERT ... SELECT``, their alerts to ``alerts_archive``, and both are then
+deleted from the hot tables. Work is done in batches of
+``LOAN_ARCHIVE_BATCH_SIZE`` loans, one transaction each, so a large backlog
+never holds long locks and an interrupted run simply resumes next time.
+"""
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, insert, literal, or_, select
+
+from backend import db
+from backend.models import Alert, ArchivedAlert, ArchivedLoan, Loan
+from backend.controllers.stats_controller import invalidate_stats
+from backend.utils.search import index_rows, supported as search_supported
+
+
+CLOSED_STATUSES = ("returned", "rejected", "cancelled")
+
+
+def _archivable(cutoff: datetime):
+    return and_(
+        Loan.status.in_(CLOSED_STATUSES),
+        Loan.loan_date < cutoff,
+        or_(Loan.return_date.is_(None), Loan.return_date < cutoff),
+        # the newest loan and the loan of the newest alert always stay: SQLite
+        # (and MySQL < 8 after a restart) hand out max(id) + 1, which would
+        # reuse an archived id
+        Loan.id < select(func.max(Loan.id)).scalar_subquery(),
+        Loan.id != func.coalesce(
+            select(Alert.loan_id).where(Alert.id == select(func.max(Alert.id)).scalar_subquery()).scalar_subquery(),
+            0,
+        ),
+    )
+
+
+def _archive_batch(ids, now: datetime) -> int:
+    loan_columns = [getattr(Loan, name) for name in ArchivedLoan.COPIED_COLUMNS]
+    db.session.execute(
+        insert(ArchivedLoan).from_select(
+            [*ArchivedLoan.COPIED_COLUMNS, "archived_at"],
+            select(*loan_columns, literal(now, ArchivedLoan.archived_at.type)).where(Loan.id.in_(ids)),
+        )
+    )
+    alert_columns = [getattr(Alert, name) for name in ArchivedAlert.COPIED_COLUMNS]
+    alerts = db.session.execute(
+        insert(ArchivedAlert).from_select(
+            list(ArchivedAlert.COPIED_COLUMNS), select(*alert_columns).where(Alert.loan_id.in_(ids))
+        )
+    ).rowcount
+    db.session.execute(delete(Alert).where(Alert.loan_id.in_(ids)))
+    db.session.execute(delete(Loan).where(Loan.id.in_(ids)))
+    # bulk DELETEs bypass the flush-time index sync
+    if search_supported():
+        index_rows(db.session.connection(), {}, {"loans": ids})
+    return alerts
+
+
+def archive_loans(now: datetime = None, older_than_days: float = None, batch_size: int = None) -> dict:
+    """Archive every eligible loan; returns loans/alerts moved and the run time in ms."""
+    config = current_app.config
+    now = now or datetime.utcnow()
+    days = config["LOAN_ARCHIVE_AFTER_DAYS"] if older_than_days is None else older_than_days
+    batch_size = batch_size or config["LOAN_ARCHIVE_BATCH_SIZE"]
+    cutoff = now - timedelta(days=days)
+
+    started = time.perf_counter()
+    loans = alerts = 0
+    while True:
+        ids = db.session.scalars(
+            select(Loan.id).where(_archivable(cutoff)).order_by(Loan.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        try:
+            alerts += _archive_batch(ids, now)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        loans += len(ids)
+
+    if loans:
+        invalidate_stats()
+    return {
+        "loans": loans,
+        "alerts": alerts,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
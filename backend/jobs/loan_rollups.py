@@ -0,0 +1,150 @@
+"""Maintain ``loan_daily_rollups`` from the loans and archived loans tables.
+
+Rollups are recomputed a whole day at a time: the rows of a window of days
+are deleted and rebuilt by one ``INSERT ... SELECT`` that groups the loans
+started (``ix_loans_loan_date``) and returned (``ix_loans_return_date``) in
+the window by day and equipment type (``unknown`` once the equipment is
+deleted). A regular run covers the days from ``LOAN_ROLLUP_LOOKBACK_DAYS``
+before the last day the previous run refreshed (``loan_rollup_progress``)
+through today, so it reads only recent loans, even after a quiet period,
+and picks up approvals and edits made within that lookback. The first run
+(empty table) starts at the oldest loan; older history that changes later
+(imports, deletions) needs ``--since``/``--full``.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import DateTime, Float, Integer, and_, case, delete, func, insert, literal, select, union_all
+
+from backend import db
+from backend.models import ArchivedLoan, Equipment, Loan, LoanDailyRollup, LoanRollupProgress
+from backend.utils.usage_counters import HANDED_OUT_STATUSES, hours_between
+
+
+# days rebuilt per transaction
+WINDOW_DAYS = 31
+# equipment_type of loans whose equipment was deleted
+UNKNOWN_EQUIPMENT_TYPE = "unknown"
+# the loan_rollup_progress row of the daily rollups
+PROGRESS_NAME = "loan_daily_rollups"
+
+
+def _activity(model, start: datetime, end: datetime, dialect: str):
+    """Loans of ``model`` started or returned in [start, end), one row per event."""
+    # archived loans outlive their equipment; keep them, under "unknown"
+    equipment_type = func.coalesce(Equipment.type, literal(UNKNOWN_EQUIPMENT_TYPE))
+    started = (
+        select(
+            func.date(model.loan_date).label("day"),
+            equipment_type.label("equipment_type"),
+            literal(1, Integer).label("loans"),
+            literal(0, Integer).label("returns"),
+            literal(0.0, Float).label("hours"),
+            literal(0, Integer).label("overdue"),
+        )
+        .outerjoin_from(model, Equipment, Equipment.id == model.equipment_id)
+        .where(model.status.in_(HANDED_OUT_STATUSES), model.loan_date >= start, model.loan_date < end)
+    )
+    returned = (
+        select(
+            func.date(model.return_date),
+            equipment_type,
+            literal(0, Integer),
+            literal(1, Integer),
+            hours_between(func.coalesce(model.start_date, model.loan_date), model.return_date, dialect),
+            case((and_(model.due_date.is_not(None), model.return_date > model.due_date), 1), else_=0),
+        )
+        .outerjoin_from(model, Equipment, Equipment.id == model.equipment_id)
+        .where(model.status == "returned", model.return_date >= start, model.return_date < end)
+    )
+    return [started, returned]
+
+
+def _rollup_window(first_day: date, end_day: date, now: datetime) -> int:
+    """Rebuild the rows of the days in [first_day, end_day); returns the rows written."""
+    start = datetime.combine(first_day, datetime.min.time())
+    end = datetime.combine(end_day, datetime.min.time())
+    dialect = db.session.connection().dialect.name
+
+    activity = union_all(
+        *_activity(Loan, start, end, dialect), *_activity(ArchivedLoan, start, end, dialect)
+    ).subquery()
+    rows = select(
+        activity.c.day,
+        activity.c.equipment_type,
+        func.sum(activity.c.loans),
+        func.sum(activity.c.returns),
+        func.sum(activity.c.hours),
+        func.sum(activity.c.overdue),
+        literal(now, DateTime),
+    ).group_by(activity.c.day, activity.c.equipment_type)
+
+    table = LoanDailyRollup.__table__
+    db.session.execute(delete(table).where(table.c.day >= first_day, table.c.day < end_day))
+    return db.session.execute(
+        insert(table).from_select(
+            ["day", "equipment_type", "loans", "returns", "loaned_hours", "overdue_returns", "refreshed_at"], rows
+        )
+    ).rowcount
+
+
+def _oldest_loan_day():
+    oldest = [
+        db.session.scalar(select(func.min(model.loan_date))) for model in (Loan, ArchivedLoan)
+    ]
+    oldest = [value for value in oldest if value is not None]
+    return min(oldest).date() if oldest else None
+
+
+def _start_day(lookback: int):
+    """Where a regular run starts: ``lookback`` days before the last day refreshed."""
+    progress = db.session.get(LoanRollupProgress, PROGRESS_NAME)
+    # databases rolled up before progress was recorded: the newest rolled-up day
+    last = progress.refreshed_through if progress else db.session.scalar(select(func.max(LoanDailyRollup.day)))
+    return last - timedelta(days=lookback) if last is not None else _oldest_loan_day()
+
+
+def _record_progress(last_day: date, now: datetime):
+    progress = db.session.get(LoanRollupProgress, PROGRESS_NAME)
+    if progress is None:
+        db.session.add(LoanRollupProgress(name=PROGRESS_NAME, refreshed_through=last_day, refreshed_at=now))
+    elif last_day >= progress.refreshed_through:
+        # a --since backfill of older days leaves the regular runs where they were
+        progress.refreshed_through, progress.refreshed_at = last_day, now
+
+
+def refresh_rollups(now: datetime = None, since: date = None, full: bool = False, lookback_days: int = None) -> dict:
+    """Recompute the rollups from ``since`` (default: the lookback window) through today.
+
+    Returns the number of days covered and rows written, and the run time in ms.
+    """
+    now = now or datetime.utcnow()
+    lookback = current_app.config["LOAN_ROLLUP_LOOKBACK_DAYS"] if lookback_days is None else lookback_days
+    end_day = now.date() + timedelta(days=1)
+
+    if full:
+        since = _oldest_loan_day()
+    elif since is None:
+        since = _start_day(lookback)
+
+    started = time.perf_counter()
+    days = rows = 0
+    first_day = since
+    while first_day is not None and first_day < end_day:
+        window_end = min(first_day + timedelta(days=WINDOW_DAYS), end_day)
+        try:
+            rows += _rollup_window(first_day, window_end, now)
+            _record_progress(window_end - timedelta(days=1), now)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        days += (window_end - first_day).days
+        first_day = window_end
+
+    return {
+        "days": days,
+        "rows": rows,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,106 @@
+"""Raise "overdue" and "reminder" alerts for active loans.
+
+Each alert type is one ``INSERT INTO alerts ... SELECT`` over the active loans
+(``ix_loans_status_due_date``), so a run costs two statements however many
+loans are due. Loans that already have the alert are skipped by a NOT EXISTS
+anti-join on ``ix_alerts_loan_id_alert_type``, which makes runs idempotent:
+re-running, or running again before the next interval, inserts nothing new.
+Overlapping runs (cron plus ``--loop``, or several hosts) take turns on a
+run lock, so the second one's anti-join sees what the first one committed.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, insert, literal, or_, select, text
+
+from backend import db
+from backend.models import Alert, Loan
+
+
+RUN_LOCK_NAME = "overdue-alerts"
+# how long a run waits for an overlapping one to finish
+RUN_LOCK_TIMEOUT_SECONDS = 60
+
+
+@contextmanager
+def _run_lock():
+    """Serialize runs across processes and hosts for the whole transaction.
+
+    MySQL: a named lock (``GET_LOCK``), held on its own connection until the
+    run has committed. SQLite needs none: an ``INSERT ... SELECT`` takes the
+    database write lock before it reads, so a second run's anti-join waits
+    for the first one's commit.
+    """
+    if db.engine.dialect.name not in {"mysql", "mariadb"}:
+        yield
+        return
+    with db.engine.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"), {"name": RUN_LOCK_NAME, "timeout": RUN_LOCK_TIMEOUT_SECONDS}
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError("Another overdue scan is still running")
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": RUN_LOCK_NAME})
+
+
+def _due_before(moment: datetime, duration: timedelta):
+    # loans created before due dates existed fall back to loan_date + duration
+    return or_(
+        Loan.due_date < moment,
+        and_(Loan.due_date.is_(None), Loan.loan_date < moment - duration),
+    )
+
+
+def _alerts_to_insert(alert_type: str, now: datetime, due_condition, skip_types):
+    """(loan_id, alert_type, date) of the active loans matching ``due_condition`` without such an alert."""
+    already_alerted = (
+        select(Alert.id)
+        .where(Alert.loan_id == Loan.id, Alert.alert_type.in_(skip_types))
+        .exists()
+    )
+    return select(
+        Loan.id,
+        literal(alert_type, Alert.alert_type.type),
+        literal(now, Alert.date.type),
+    ).where(Loan.status == "active", due_condition, ~already_alerted)
+
+
+def _insert_alerts(alert_type: str, now: datetime, due_condition, skip_types) -> int:
+    rows = _alerts_to_insert(alert_type, now, due_condition, skip_types)
+    stmt = insert(Alert).from_select(["loan_id", "alert_type", "date"], rows)
+    return db.session.execute(stmt).rowcount
+
+
+def run_overdue_scan(now: datetime = None) -> dict:
+    """Insert missing overdue/reminder alerts in one transaction.
+
+    Returns the number of alerts inserted per type and the run time in ms.
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    duration = timedelta(days=config.get("LOAN_DURATION_DAYS", 7))
+    lead = timedelta(hours=config.get("LOAN_REMINDER_HOURS", 24))
+
+    started = time.perf_counter()
+    with _run_lock():
+        try:
+            overdue = _insert_alerts("overdue", now, _due_before(now, duration), ["overdue"])
+            # overdue loans inserted above are excluded, so a loan never gets a
+            # reminder after it is already late
+            reminder = _insert_alerts(
+                "reminder", now, _due_before(now + lead, duration), ["reminder", "overdue"]
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return {
+        "overdue": overdue,
+        "reminder": reminder,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
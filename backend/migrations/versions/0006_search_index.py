@@ -0,0 +1,65 @@
+"""full-text search index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 13:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+# Documents are keyed by ref_id * 4 + kind code (users 1, equipments 2, loans 3);
+# see backend/utils/search.py, which keeps the table in sync afterwards.
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "body, kind UNINDEXED, ref_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+MYSQL_DDL = (
+    "CREATE TABLE search_index ("
+    "id BIGINT NOT NULL PRIMARY KEY, "
+    "kind VARCHAR(20) NOT NULL, "
+    "ref_id INTEGER NOT NULL, "
+    "body TEXT NOT NULL, "
+    "FULLTEXT KEY ft_search_index_body (body)"
+    ") ENGINE=InnoDB"
+)
+
+
+def _populate(key, words):
+    op.execute(
+        f"INSERT INTO search_index ({key}, kind, ref_id, body) "
+        f"SELECT id * 4 + 1, 'users', id, {words('name', 'email')} FROM users"
+    )
+    op.execute(
+        f"INSERT INTO search_index ({key}, kind, ref_id, body) "
+        f"SELECT id * 4 + 2, 'equipments', id, {words('name', 'type', 'description')} FROM equipments"
+    )
+    op.execute(
+        f"INSERT INTO search_index ({key}, kind, ref_id, body) "
+        f"SELECT l.id * 4 + 3, 'loans', l.id, {words('u.name', 'u.email', 'e.name')} FROM loans l "
+        "LEFT OUTER JOIN users u ON u.id = l.user_id "
+        "LEFT OUTER JOIN equipments e ON e.id = l.equipment_id"
+    )
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute(SQLITE_DDL)
+        _populate("rowid", lambda *cols: " || ' ' || ".join(f"coalesce({c}, '')" for c in cols))
+    elif dialect == "mysql":
+        op.execute(MYSQL_DDL)
+        _populate("id", lambda *cols: "concat_ws(' ', " + ", ".join(f"coalesce({c}, '')" for c in cols) + ")")
+
+
+def downgrade():
+    if op.get_bind().dialect.name in ("sqlite", "mysql"):
+        op.execute("DROP TABLE search_index")
@@ -0,0 +1,33 @@
+"""lowercase user emails
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 14:26:19.556932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # emails are now stored stripped and lowercased (models.user.normalize_email);
+    # accounts that differ only by case must be merged by hand first
+    bind = op.get_bind()
+    clashes = bind.execute(sa.text(
+        "SELECT LOWER(TRIM(email)) FROM users GROUP BY LOWER(TRIM(email)) HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if clashes:
+        raise RuntimeError(f"Users whose emails differ only by case or spaces: {', '.join(clashes)}")
+    op.execute("UPDATE users SET email = LOWER(TRIM(email)) WHERE email <> LOWER(TRIM(email))")
+
+
+def downgrade():
+    # the original casing is not kept
+    pass
@@ -1,6 +1,23 @@
-from .user import User
+from .user import User, normalize_email
 from .equipment import Equipment
 from .loan import Loan
 from .alert import Alert
+from .table_version import TableVersion
+from .archive import ArchivedLoan, ArchivedAlert
+from .usage_stats import UserLoanStats, EquipmentUsageStats
+from .loan_rollup import LoanDailyRollup, LoanRollupProgress
 
-__all__ = ["User", "Equipment", "Loan", "Alert"]
+__all__ = [
+    "User",
+    "normalize_email",
+    "Equipment",
+    "Loan",
+    "Alert",
+    "TableVersion",
+    "ArchivedLoan",
+    "ArchivedAlert",
+    "UserLoanStats",
+    "EquipmentUsageStats",
+    "LoanDailyRollup",
+    "LoanRollupProgress",
+]
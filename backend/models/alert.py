@@ -8,10 +8,20 @@ class Alert(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     loan_id = db.Column(db.Integer, db.ForeignKey("loans.id"), nullable=False)
     alert_type = db.Column(db.String(50), nullable=False)  # e.g. overdue, reminder
-    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
     loan = db.relationship("Loan", back_populates="alerts")
 
+    __table_args__ = (
+        # a loan's alerts, and the "already alerted?" anti-join of the overdue
+        # job. Not unique: staff may add alerts of any type by hand; the job
+        # avoids duplicates by running under a lock (jobs/overdue_alerts.py)
+        db.Index("ix_alerts_loan_id_alert_type", loan_id, alert_type),
+    )
+
+    # keys of to_dict(), in order; list endpoints accept any subset as ?fields=
+    FIELDS = ("id", "loan_id", "alert_type", "date")
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,67 @@
+from backend import db
+from .user import User
+from .equipment import Equipment
+from .loan import Loan
+
+
+class ArchivedLoan(db.Model):
+    """Closed loan moved out of ``loans`` by ``flask archive-loans``.
+
+    Same columns and ids as ``Loan`` (minus the optimistic-lock version), so
+    history listings can ``UNION ALL`` both tables. No foreign keys: archived
+    rows are never updated and must not hold up deleting users or equipments.
+    """
+
+    __tablename__ = "loans_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    equipment_id = db.Column(db.Integer, nullable=False)
+    loan_date = db.Column(db.DateTime, nullable=False)
+    return_date = db.Column(db.DateTime, nullable=True)
+    start_date = db.Column(db.DateTime, nullable=True)
+    due_date = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.String(30), nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_loans_archive_user_id_loan_date", user_id, loan_date),
+        db.Index("ix_loans_archive_loan_date", loan_date),
+    )
+
+    # columns copied from loans, in order
+    COPIED_COLUMNS = ("id", "user_id", "equipment_id", "loan_date", "return_date", "start_date", "due_date", "status")
+
+    @classmethod
+    def listing_query(cls):
+        """Same projection (and row shape) as ``Loan.listing_query()``."""
+        return (
+            db.session.query(
+                cls.id,
+                cls.user_id,
+                cls.equipment_id,
+                cls.loan_date,
+                cls.return_date,
+                cls.start_date,
+                cls.due_date,
+                cls.status,
+                User.name.label("user_name"),
+                Equipment.name.label("equipment_name"),
+            )
+            .select_from(cls)
+            .outerjoin(User, User.id == cls.user_id)
+            .outerjoin(Equipment, Equipment.id == cls.equipment_id)
+        )
+
+    row_to_dict = staticmethod(Loan.row_to_dict)
+
+
+class ArchivedAlert(db.Model):
+    __tablename__ = "alerts_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    loan_id = db.Column(db.Integer, nullable=False, index=True)
+    alert_type = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.DateTime, nullable=False)
+
+    COPIED_COLUMNS = ("id", "loan_id", "alert_type", "date")
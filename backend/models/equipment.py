@@ -8,12 +8,19 @@ class Equipment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     type = db.Column(db.String(50), nullable=False)  # laptop, projector, tablet, camera
-    status = db.Column(db.String(30), nullable=False, default="available")  # available, loaned, under_maintenance
+    status = db.Column(db.String(30), nullable=False, default="available", index=True)  # available, loaned, under_maintenance
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Optimistic lock: every UPDATE checks and bumps this (see utils/transactions.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     loans = db.relationship("Loan", back_populates="equipment", lazy=True)
 
+    __mapper_args__ = {"version_id_col": version}
+
+    # keys of to_dict(), in order; list endpoints accept any subset as ?fields=
+    FIELDS = ("id", "name", "type", "status", "description", "created_at")
+
     def to_dict(self):
         return {
             "id": self.id,
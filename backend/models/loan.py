@@ -1,5 +1,7 @@
 from datetime import datetime
 from backend import db
+from .user import User
+from .equipment import Equipment
 
 
 class Loan(db.Model):
@@ -10,13 +12,53 @@ class Loan(db.Model):
     equipment_id = db.Column(db.Integer, db.ForeignKey("equipments.id"), nullable=False)
     loan_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     return_date = db.Column(db.DateTime, nullable=True)
-    # pending -> active (approved) -> returned / rejected / cancelled
+    # booked period: [start_date, due_date). start_date equals loan_date
+    # unless the loan was booked ahead as a reservation
+    start_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
+    # set when the loan becomes active; NULL on loans created before due dates existed
+    due_date = db.Column(db.DateTime, nullable=True)
+    # pending -> active (approved) -> returned / rejected / cancelled;
+    # approved reservations wait as reserved until their start date
     status = db.Column(db.String(30), nullable=False, default="pending")
+    # Optimistic lock: every UPDATE checks and bumps this (see utils/transactions.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     user = db.relationship("User", back_populates="loans")
     equipment = db.relationship("Equipment", back_populates="loans")
     alerts = db.relationship("Alert", back_populates="loan", lazy=True)
 
+    __table_args__ = (
+        # /loans/me: a user's loans, newest first (read backwards, which also
+        # yields id DESC on ties, so keyset pages need no extra sort)
+        db.Index("ix_loans_user_id_loan_date", user_id, loan_date),
+        # status filters and the dashboard's most recent pending requests
+        db.Index("ix_loans_status_loan_date", status, loan_date),
+        # booking conflicts / free slots: an equipment's reserved and active
+        # loans (the status skips closed history), by due date
+        db.Index("ix_loans_equipment_id_status_due_date", equipment_id, status, due_date),
+        # admin listing / keyset pages ordered by loan_date
+        db.Index("ix_loans_loan_date", loan_date),
+        # overdue/reminder scan: active loans by due date
+        db.Index("ix_loans_status_due_date", status, due_date),
+        # daily rollups: loans returned in a range of days
+        db.Index("ix_loans_return_date", return_date),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+    # keys of to_dict(), in order; list endpoints accept any subset as ?fields=
+    FIELDS = (
+        "id",
+        "user_id",
+        "equipment_id",
+        "loan_date",
+        "return_date",
+        "start_date",
+        "due_date",
+        "status",
+        "user_name",
+        "equipment_name",
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -24,8 +66,51 @@ class Loan(db.Model):
             "equipment_id": self.equipment_id,
             "loan_date": self.loan_date.isoformat() if self.loan_date else None,
             "return_date": self.return_date.isoformat() if self.return_date else None,
+            "start_date": self.start_date.isoformat() if self.start_date else None,
+            "due_date": self.due_date.isoformat() if self.due_date else None,
             "status": self.status,
             # lightweight joined info for UI convenience
             "user_name": self.user.name if self.user else None,
             "equipment_name": self.equipment.name if self.equipment else None,
         }
+
+    @classmethod
+    def listing_query(cls):
+        """Column-only projection of loans joined with user/equipment names.
+
+        Listing endpoints use this instead of ``to_dict()`` per ORM row so the
+        names come back in the same SELECT (no lazy load per row).
+        """
+        return (
+            db.session.query(
+                cls.id,
+                cls.user_id,
+                cls.equipment_id,
+                cls.loan_date,
+                cls.return_date,
+                cls.start_date,
+                cls.due_date,
+                cls.status,
+                User.name.label("user_name"),
+                Equipment.name.label("equipment_name"),
+            )
+            .select_from(cls)
+            .outerjoin(User, User.id == cls.user_id)
+            .outerjoin(Equipment, Equipment.id == cls.equipment_id)
+        )
+
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize a row from ``listing_query()`` with the same shape as ``to_dict()``."""
+        return {
+            "id": row.id,
+            "user_id": row.user_id,
+            "equipment_id": row.equipment_id,
+            "loan_date": row.loan_date.isoformat() if row.loan_date else None,
+            "return_date": row.return_date.isoformat() if row.return_date else None,
+            "start_date": row.start_date.isoformat() if row.start_date else None,
+            "due_date": row.due_date.isoformat() if row.due_date else None,
+            "status": row.status,
+            "user_name": row.user_name,
+            "equipment_name": row.equipment_name,
+        }
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from backend import db
+
+
+class LoanDailyRollup(db.Model):
+    """Loan activity per day and equipment type, maintained by ``flask rollup-loans``.
+
+    ``loans`` counts handed-out loans (active/returned) by the day of their
+    ``loan_date``; ``returns``, ``loaned_hours`` and ``overdue_returns``
+    describe the loans returned that day. Archived loans are included, so
+    archiving never changes a report. See ``jobs/loan_rollups.py``.
+    """
+
+    __tablename__ = "loan_daily_rollups"
+
+    day = db.Column(db.Date, primary_key=True)
+    equipment_type = db.Column(db.String(50), primary_key=True)
+    loans = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    returns = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    loaned_hours = db.Column(db.Float, nullable=False, default=0, server_default="0")
+    overdue_returns = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class LoanRollupProgress(db.Model):
+    """How far ``flask rollup-loans`` got: the next regular run starts from here.
+
+    Kept apart from the rollup rows, which only exist for days with activity,
+    so a quiet period does not make every later run recompute it again.
+    """
+
+    __tablename__ = "loan_rollup_progress"
+
+    name = db.Column(db.String(50), primary_key=True)
+    # last day recomputed (inclusive)
+    refreshed_through = db.Column(db.Date, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
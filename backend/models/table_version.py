@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from sqlalchemy import event, inspect, insert, update
+
+from backend import db
+
+
+# Tables whose changes are counted; GET responses derive their ETag from these
+TRACKED_TABLES = ("users", "equipments", "loans", "alerts")
+
+
+class TableVersion(db.Model):
+    """Change counter per table, bumped in the same transaction as every write.
+
+    Read endpoints turn the counters of the tables they show into an ETag
+    (see ``utils/conditional.py``), so "has anything changed?" costs one
+    primary-key lookup instead of loading and serializing rows.
+    """
+
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _seed_table_versions(table, connection, **kw):
+    now = datetime.utcnow()
+    connection.execute(
+        insert(table), [{"name": name, "version": 1, "updated_at": now} for name in TRACKED_TABLES]
+    )
+
+
+def bump_table_versions(session, names):
+    names = sorted(set(names).intersection(TRACKED_TABLES))
+    if not names:
+        return
+    # Core statement on the session's connection: no ORM flush/events, same
+    # transaction as the write. Sorted so concurrent writers lock rows in one order.
+    table = TableVersion.__table__
+    session.connection().execute(
+        update(table)
+        .where(table.c.name.in_(names))
+        .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+    )
+
+
+@event.listens_for(db.session, "after_flush")
+def _bump_after_flush(session, flush_context):
+    changed = {inspect(obj).mapper.local_table.name for obj in session.new}
+    changed.update(inspect(obj).mapper.local_table.name for obj in session.deleted)
+    changed.update(
+        inspect(obj).mapper.local_table.name
+        for obj in session.dirty
+        if session.is_modified(obj, include_collections=False)
+    )
+    bump_table_versions(session, changed)
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _bump_after_bulk_statement(orm_execute_state):
+    # insert()/update()/delete() run through session.execute (bulk imports, the
+    # overdue job, Query.delete()) bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            bump_table_versions(orm_execute_state.session, [table.name])
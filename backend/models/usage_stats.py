@@ -0,0 +1,49 @@
+from backend import db
+
+
+class UserLoanStats(db.Model):
+    """Per-user loan counters, kept current by the loan transitions.
+
+    Only loans that were actually handed out count (``active`` and
+    ``returned``, archived ones included); users without any have no row,
+    or a zero row once a loan limit was checked for them.
+    See ``utils/usage_counters.py``.
+    """
+
+    __tablename__ = "user_loan_stats"
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    active_loans = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_loans = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_loan_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "active_loans": self.active_loans,
+            "total_loans": self.total_loans,
+            "last_loan_at": self.last_loan_at.isoformat() if self.last_loan_at else None,
+        }
+
+
+class EquipmentUsageStats(db.Model):
+    """Per-equipment usage: loans handed out and hours of returned loans."""
+
+    __tablename__ = "equipment_usage_stats"
+
+    equipment_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    loan_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_loaned_hours = db.Column(db.Float, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # "most used" reports read the top of these
+        db.Index("ix_equipment_usage_stats_loan_count", loan_count),
+        db.Index("ix_equipment_usage_stats_total_loaned_hours", total_loaned_hours),
+    )
+
+    def to_dict(self):
+        return {
+            "equipment_id": self.equipment_id,
+            "loan_count": self.loan_count,
+            "total_loaned_hours": round(self.total_loaned_hours, 2),
+        }
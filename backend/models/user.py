@@ -1,7 +1,15 @@
 from datetime import datetime
+
+from sqlalchemy.orm import validates
+
 from backend import db
 
 
+def normalize_email(email):
+    """Emails are stored and looked up stripped and lowercased, so the unique index decides duplicates."""
+    return email.strip().lower() if isinstance(email, str) else email
+
+
 class User(db.Model):
     __tablename__ = "users"
 
@@ -14,6 +22,13 @@ class User(db.Model):
 
     loans = db.relationship("Loan", back_populates="user", lazy=True)
 
+    # keys of to_dict(), in order; list endpoints accept any subset as ?fields=
+    FIELDS = ("id", "name", "email", "role", "created_at")
+
+    @validates("email")
+    def _normalize_email(self, key, email):
+        return normalize_email(email)
+
     def to_dict(self):
         return {
             "id": self.id,
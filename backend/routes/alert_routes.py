@@ -3,16 +3,46 @@ from flask import Blueprint, request, jsonify
 from backend import db
 from backend.models import Alert
 from backend.controllers.auth_controller import token_required
+from backend.utils.conditional import conditional
+from backend.utils.pagination import InvalidListArgument, apply_date_range, paginate, parse_int_arg
+from backend.utils.streaming import list_response
 
 alerts_bp = Blueprint("alerts", __name__)
 
 
+# listing order (newest first); the id makes page cursors unique
+ALERT_ORDER = [Alert.date, Alert.id]
+
+
+def filtered_alerts(args):
+    query = Alert.query
+    alert_type = args.get("alert_type")
+    if alert_type:
+        query = query.filter_by(alert_type=alert_type)
+    loan_id = parse_int_arg(args, "loan_id")
+    if loan_id is not None:
+        query = query.filter_by(loan_id=loan_id)
+    return apply_date_range(query, Alert.date, args)
+
+
 @alerts_bp.get("")
 @token_required(roles=["admin", "teacher"])
+@conditional("alerts")
 def list_alerts_route():
-    alerts = Alert.query.order_by(Alert.date.desc()).all()
-    body = {"alerts": [a.to_dict() for a in alerts]}
-    return jsonify(body), 200
+    args = request.args
+    try:
+        body = paginate(
+            filtered_alerts(args),
+            ALERT_ORDER,
+            args,
+            lambda a: a.to_dict(),
+            key="alerts",
+            descending=True,
+            fields=Alert.FIELDS,
+        )
+    except InvalidListArgument as exc:
+        return jsonify({"message": str(exc)}), 400
+    return list_response(body, 200)
 
 
 @alerts_bp.post("")
@@ -1,19 +1,32 @@
 from flask import Blueprint, request, jsonify
 
-from backend.controllers.auth_controller import register_user, login_user
+from backend.controllers.auth_controller import register_user, login_user, cache_stats, token_required
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def _auth_response(body, status):
+    response = jsonify(body)
+    if status == 429 and "retry_after" in body:
+        response.headers["Retry-After"] = str(body["retry_after"])
+    return response, status
+
+
 @auth_bp.post("/register")
 def register():
     data = request.get_json() or {}
     body, status = register_user(data)
-    return jsonify(body), status
+    return _auth_response(body, status)
 
 
 @auth_bp.post("/login")
 def login():
     data = request.get_json() or {}
     body, status = login_user(data)
-    return jsonify(body), status
+    return _auth_response(body, status)
+
+
+@auth_bp.get("/cache-stats")
+@token_required(roles=["admin"])
+def cache_stats_route():
+    return jsonify(cache_stats()), 200
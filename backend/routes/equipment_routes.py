@@ -6,8 +6,13 @@ from backend.controllers.equipment_controller import (
     create_equipment,
     update_equipment,
     delete_equipment,
+    equipment_usage,
 )
+from backend.controllers.reservation_controller import equipment_availability
 from backend.controllers.auth_controller import token_required
+from backend.utils.conditional import conditional
+from backend.utils.streaming import list_response
+from backend.controllers.bulk_controller import import_equipments, import_response, export_response
 
 
 equipment_bp = Blueprint("equipments", __name__)
@@ -15,9 +20,23 @@ equipment_bp = Blueprint("equipments", __name__)
 
 @equipment_bp.get("")
 @token_required(roles=["admin", "teacher", "student"])
+@conditional("equipments")
 def list_equipments_route():
-    status = request.args.get("status")
-    body, status_code = list_equipments(status)
+    body, status_code = list_equipments(request.args)
+    return list_response(body, status_code)
+
+
+@equipment_bp.get("/usage")
+@token_required(roles=["admin", "teacher"])
+def equipment_usage_route():
+    body, status_code = equipment_usage(request.args)
+    return jsonify(body), status_code
+
+
+@equipment_bp.get("/availability")
+@token_required(roles=["admin", "teacher", "student"])
+def equipment_availability_route():
+    body, status_code = equipment_availability(request.args)
     return jsonify(body), status_code
 
 
@@ -29,8 +48,21 @@ def create_equipment_route():
     return jsonify(body), status_code
 
 
+@equipment_bp.post("/import")
+@token_required(roles=["admin"])
+def import_equipments_route():
+    return import_response(import_equipments)
+
+
+@equipment_bp.get("/export")
+@token_required(roles=["admin"])
+def export_equipments_route():
+    return export_response("equipments")
+
+
 @equipment_bp.get("/<int:equipment_id>")
 @token_required(roles=["admin", "teacher", "student"])
+@conditional("equipments")
 def get_equipment_route(equipment_id):
     body, status_code = get_equipment(equipment_id)
     return jsonify(body), status_code
@@ -0,0 +1,43 @@
+from flask import Blueprint, Response, current_app, g, jsonify, request
+
+from backend.controllers.auth_controller import generate_stream_ticket, token_required
+from backend.utils.events import event_stream, get_broker
+
+
+events_bp = Blueprint("events", __name__)
+
+TICKET_PURPOSE = "events"
+
+
+@events_bp.post("/ticket")
+@token_required(roles=["admin", "teacher", "student"])
+def events_ticket_route():
+    if get_broker() is None:
+        return jsonify({"message": "Event stream is disabled"}), 404
+    ticket = generate_stream_ticket(g.current_user, TICKET_PURPOSE)
+    return jsonify({"ticket": ticket, "expires_in": current_app.config["STREAM_TICKET_SECONDS"]}), 200
+
+
+@events_bp.get("")
+@token_required(roles=["admin", "teacher", "student"], query_ticket=TICKET_PURPOSE)
+def events_route():
+    broker = get_broker()
+    if broker is None:
+        return jsonify({"message": "Event stream is disabled"}), 404
+
+    config = current_app.config
+    subscription = broker.subscribe(request.headers.get("Last-Event-ID") or request.args.get("last_event_id"))
+    # The generator runs after the request context is gone: it only touches
+    # the subscription, never the database, so no pooled connection is held.
+    stream = event_stream(
+        subscription,
+        g.current_user,
+        heartbeat=config["EVENTS_HEARTBEAT_SECONDS"],
+        max_seconds=config["EVENTS_STREAM_SECONDS"],
+        retry_ms=int(config["EVENTS_RETRY_MS"]),
+    )
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -7,10 +7,15 @@ from backend.controllers.loan_controller import (
     create_loan,
     approve_loan,
     reject_loan,
+    cancel_loan,
     close_loan,
     delete_loan,
+    batch_transition,
 )
 from backend.controllers.auth_controller import token_required
+from backend.utils.conditional import conditional
+from backend.utils.streaming import list_response
+from backend.controllers.bulk_controller import import_loans, import_response, export_response
 
 
 loan_bp = Blueprint("loans", __name__)
@@ -18,16 +23,18 @@ loan_bp = Blueprint("loans", __name__)
 
 @loan_bp.get("")
 @token_required(roles=["admin"])
+@conditional("loans", "users", "equipments")
 def list_loans_route():
-    body, status_code = list_loans()
-    return jsonify(body), status_code
+    body, status_code = list_loans(request.args)
+    return list_response(body, status_code)
 
 
 @loan_bp.get("/me")
 @token_required(roles=["teacher", "student"])
+@conditional("loans", "users", "equipments")
 def list_my_loans_route():
-    body, status_code = list_my_loans()
-    return jsonify(body), status_code
+    body, status_code = list_my_loans(request.args)
+    return list_response(body, status_code)
 
 
 @loan_bp.post("")
@@ -38,8 +45,29 @@ def create_loan_route():
     return jsonify(body), status_code
 
 
+@loan_bp.post("/import")
+@token_required(roles=["admin"])
+def import_loans_route():
+    return import_response(import_loans)
+
+
+@loan_bp.get("/export")
+@token_required(roles=["admin"])
+def export_loans_route():
+    return export_response("loans")
+
+
+@loan_bp.post("/batch/<action>")
+@token_required(roles=["admin"])
+def batch_transition_route(action):
+    data = request.get_json() or {}
+    body, status_code = batch_transition(action, data)
+    return jsonify(body), status_code
+
+
 @loan_bp.get("/<int:loan_id>")
 @token_required(roles=["admin"])
+@conditional("loans", "users", "equipments")
 def get_loan_route(loan_id):
     body, status_code = get_loan(loan_id)
     return jsonify(body), status_code
@@ -59,6 +87,13 @@ def reject_loan_route(loan_id):
     return jsonify(body), status_code
 
 
+@loan_bp.post("/<int:loan_id>/cancel")
+@token_required(roles=["admin", "teacher", "student"])
+def cancel_loan_route(loan_id):
+    body, status_code = cancel_loan(loan_id)
+    return jsonify(body), status_code
+
+
 @loan_bp.post("/<int:loan_id>/close")
 @token_required(roles=["admin"])
 def close_loan_route(loan_id):
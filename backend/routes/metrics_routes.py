@@ -0,0 +1,29 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from backend.controllers.auth_controller import token_required
+from backend.utils.metrics import registry
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def _render():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+# without METRICS_TOKEN the metrics are for admins only, never public
+_render_for_admins = token_required(roles=["admin"])(_render)
+
+
+@metrics_bp.get("")
+def metrics_route():
+    # Scrapers authenticate with a static METRICS_TOKEN rather than a user JWT
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        return _render_for_admins()
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({"message": "Unauthorized"}), 401
+    return _render()
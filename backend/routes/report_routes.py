@@ -0,0 +1,23 @@
+from flask import Blueprint, Response, jsonify, request
+
+from backend.controllers.auth_controller import token_required
+from backend.controllers.report_controller import loan_report, report_csv
+
+
+reports_bp = Blueprint("reports", __name__)
+
+
+@reports_bp.get("")
+@token_required(roles=["admin", "teacher"])
+def loan_report_route():
+    fmt = (request.args.get("format") or "json").lower()
+    if fmt not in {"json", "csv"}:
+        return jsonify({"message": "Unsupported format; use json or csv"}), 400
+    body, status_code = loan_report(request.args)
+    if fmt == "json" or status_code != 200:
+        return jsonify(body), status_code
+    return Response(
+        report_csv(body),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="loan-report-{body["from"]}-{body["to"]}.csv"'},
+    )
@@ -0,0 +1,16 @@
+from flask import Blueprint, request, jsonify
+
+from backend.controllers.search_controller import search
+from backend.controllers.auth_controller import token_required
+from backend.utils.conditional import conditional
+
+
+search_bp = Blueprint("search", __name__)
+
+
+@search_bp.get("")
+@token_required(roles=["admin", "teacher", "student"])
+@conditional("loans", "users", "equipments")
+def search_route():
+    body, status_code = search(request.args)
+    return jsonify(body), status_code
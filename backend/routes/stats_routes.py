@@ -0,0 +1,17 @@
+from flask import Blueprint, request, jsonify
+
+from backend.controllers.stats_controller import get_stats
+from backend.controllers.auth_controller import token_required
+from backend.utils.conditional import conditional
+
+
+stats_bp = Blueprint("stats", __name__)
+
+
+@stats_bp.get("")
+@token_required(roles=["admin"])
+@conditional("equipments", "loans", "users")
+def get_stats_route():
+    pending_limit = request.args.get("pending_limit", 5, type=int)
+    body, status_code = get_stats(pending_limit)
+    return jsonify(body), status_code
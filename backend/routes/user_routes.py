@@ -6,17 +6,22 @@ from backend.controllers.user_controller import (
     create_user,
     update_user,
     delete_user,
+    get_user_loan_stats,
 )
 from backend.controllers.auth_controller import token_required
+from backend.utils.conditional import conditional
+from backend.utils.streaming import list_response
+from backend.controllers.bulk_controller import import_users, import_response, export_response
 
 user_bp = Blueprint("users", __name__)
 
 
 @user_bp.get("")
 @token_required(roles=["admin"])
+@conditional("users")
 def list_users_route():
-    body, status = list_users()
-    return jsonify(body), status
+    body, status = list_users(request.args)
+    return list_response(body, status)
 
 
 @user_bp.post("")
@@ -27,13 +32,33 @@ def create_user_route():
     return jsonify(body), status
 
 
+@user_bp.post("/import")
+@token_required(roles=["admin"])
+def import_users_route():
+    return import_response(import_users)
+
+
+@user_bp.get("/export")
+@token_required(roles=["admin"])
+def export_users_route():
+    return export_response("users")
+
+
 @user_bp.get("/<int:user_id>")
 @token_required(roles=["admin"])
+@conditional("users")
 def get_user_route(user_id):
     body, status = get_user(user_id)
     return jsonify(body), status
 
 
+@user_bp.get("/<int:user_id>/loan-stats")
+@token_required(roles=["admin", "teacher", "student"])
+def get_user_loan_stats_route(user_id):
+    body, status = get_user_loan_stats(user_id)
+    return jsonify(body), status
+
+
 @user_bp.put("/<int:user_id>")
 @token_required(roles=["admin"])
 def update_user_route(user_id):
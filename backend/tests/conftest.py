@@ -0,0 +1,37 @@
+import pytest
+
+from backend import create_app, db
+from backend.controllers.auth_controller import generate_token
+from backend.models import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    # A file database, shared by the test, its requests and their threads.
+    # No app context stays pushed, so each request gets its own session.
+    app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_id(app):
+    with app.app_context():
+        admin = User(name="Admin", email="admin@example.com", password="x", role="admin")
+        db.session.add(admin)
+        db.session.commit()
+        return admin.id
+
+
+@pytest.fixture
+def auth_headers(app, admin_id):
+    with app.app_context():
+        return {"Authorization": f"Bearer {generate_token(db.session.get(User, admin_id))}"}
@@ -0,0 +1,45 @@
+import threading
+from collections import Counter
+
+from backend import db
+from backend.models import Equipment, Loan
+
+THREADS = 8
+
+
+def _race(app, headers, payload):
+    """Send ``payload`` to ``POST /api/loans`` from ``THREADS`` threads at once."""
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+    lock = threading.Lock()
+
+    def request_loan():
+        client = app.test_client()
+        barrier.wait()
+        response = client.post("/api/loans", headers=headers, json=payload)
+        with lock:
+            statuses.append(response.status_code)
+
+    workers = [threading.Thread(target=request_loan) for _ in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return Counter(statuses)
+
+
+def test_concurrent_loans_of_one_equipment_book_it_once(app, admin_id, auth_headers):
+    with app.app_context():
+        equipment = Equipment(name="Projector", type="projector")
+        db.session.add(equipment)
+        db.session.commit()
+        equipment_id = equipment.id
+
+    statuses = _race(app, auth_headers, {"user_id": admin_id, "equipment_id": equipment_id})
+
+    assert statuses[201] == 1
+    # the losers see the equipment as unavailable or its period as booked
+    assert set(statuses) <= {201, 400, 409}
+    with app.app_context():
+        assert Loan.query.filter_by(equipment_id=equipment_id, status="active").count() == 1
+        assert db.session.get(Equipment, equipment_id).status == "loaned"
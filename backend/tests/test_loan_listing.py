@@ -0,0 +1,47 @@
+from sqlalchemy import event
+
+from backend import db
+from backend.models import Equipment, Loan, User
+
+
+def _add_loans(app, first: int, count: int):
+    with app.app_context():
+        for i in range(first, first + count):
+            user = User(name=f"User {i}", email=f"user{i}@example.com", password="x")
+            equipment = Equipment(name=f"Equipment {i}", type="laptop")
+            db.session.add_all([user, equipment])
+            db.session.flush()
+            db.session.add(Loan(user_id=user.id, equipment_id=equipment.id, status="active"))
+        db.session.commit()
+
+
+def _list_loans(app, client, headers):
+    """(loans listed, statements run) for one ``GET /api/loans``."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/loans", headers=headers)
+        body = response.get_json()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    return len(body["loans"]), len(statements)
+
+
+def test_loan_listing_runs_a_constant_number_of_queries(app, client, auth_headers):
+    _add_loans(app, 0, 1)
+    # the first request also loads the caller into the principal cache
+    _list_loans(app, client, auth_headers)
+    listed, one_loan = _list_loans(app, client, auth_headers)
+    assert listed == 1
+
+    _add_loans(app, 1, 25)
+    listed, many_loans = _list_loans(app, client, auth_headers)
+    assert listed == 26
+    assert many_loans == one_loan
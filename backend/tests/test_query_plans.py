@@ -0,0 +1,30 @@
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from backend import create_app, db, init_migrations
+from backend.utils.query_plans import find_full_scans
+
+
+@pytest.fixture
+def migrated_app(tmp_path):
+    # the schema of the migrations, not of create_all: a migration that
+    # forgets an index must fail here
+    app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'migrated.db'}"})
+    init_migrations(app)
+    with app.app_context():
+        upgrade()
+        yield app
+        db.session.remove()
+
+
+def test_hot_queries_use_indexes(migrated_app):
+    scans = {name: plan for name, (full_scans, plan) in find_full_scans().items() if full_scans}
+    assert scans == {}
+
+
+def test_dropped_index_is_reported(migrated_app):
+    # the overdue job's NOT EXISTS anti-join needs it
+    db.session.execute(text("DROP INDEX ix_alerts_loan_id_alert_type"))
+    scans = {name for name, (full_scans, _) in find_full_scans().items() if full_scans}
+    assert "active loans by due date (overdue job)" in scans
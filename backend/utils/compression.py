@@ -0,0 +1,99 @@
+"""gzip / brotli response compression negotiated through ``Accept-Encoding``.
+
+Bodies smaller than ``COMPRESS_MIN_SIZE`` are sent as-is (the headers would
+cost more than the saving). Streamed list responses are compressed chunk by
+chunk with a sync flush after each chunk, so rows still reach the client as
+they are read. Brotli is used when the optional ``brotli`` package is
+installed and the client accepts it; otherwise gzip.
+"""
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+    "text/html",
+}
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress(data: bytes, encoding: str, config) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=config["COMPRESS_BROTLI_QUALITY"])
+    return gzip.compress(data, compresslevel=config["COMPRESS_LEVEL"])
+
+
+def _compress_stream(chunks, encoding: str, config):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESS_BROTLI_QUALITY"])
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    # wbits=31: zlib stream with a gzip header and trailer
+    compressor = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def init_compression(app):
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+
+    @app.after_request
+    def _compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or request.method == "HEAD"
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        config = app.config
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding, config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESS_MIN_SIZE"]:
+                return response
+            response.set_data(_compress(data, encoding, config))
+
+        response.headers["Content-Encoding"] = encoding
+        # the compressed bytes differ from the identity representation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
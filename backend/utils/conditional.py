@@ -0,0 +1,86 @@
+"""Conditional GET (ETag / Last-Modified) for read endpoints.
+
+``@conditional("loans", "users")`` reads the change counters of the listed
+tables (``TableVersion``, one small query) before running the view. The
+ETag hashes those counters with everything else the response depends on:
+the path and query string, the ``Accept`` header and the caller's id/role.
+A matching ``If-None-Match`` (or, without one, an ``If-Modified-Since`` no
+older than the tables' last change) returns ``304`` without running the view,
+so unchanged lists are never queried or serialized again.
+
+Responses are per-user, so they are marked ``Cache-Control: private,
+no-cache``: browsers keep them but revalidate on every use, and shared
+caches never store them.
+"""
+import hashlib
+from functools import wraps
+
+from flask import g, make_response, request
+
+from backend import db
+from backend.models import TableVersion
+
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def _table_state(tables):
+    rows = (
+        db.session.query(TableVersion.name, TableVersion.version, TableVersion.updated_at)
+        .filter(TableVersion.name.in_(tables))
+        .all()
+    )
+    versions = {row.name: row.version for row in rows}
+    last_modified = max((row.updated_at for row in rows), default=None)
+    return versions, last_modified
+
+
+def _etag(tables, versions):
+    user = getattr(g, "current_user", None)
+    parts = [
+        ",".join(f"{name}={versions.get(name)}" for name in tables),
+        request.full_path,
+        request.headers.get("Accept", ""),
+        f"{getattr(user, 'id', '')}:{getattr(user, 'role', '')}",
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        # HTTP dates have second resolution
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.vary.add("Authorization")
+    response.vary.add("Accept")
+    return response
+
+
+def conditional(*tables):
+    """Decorate a GET view (below ``token_required``) whose output depends only on ``tables``."""
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            versions, last_modified = _table_state(tables)
+            etag = _etag(tables, versions)
+            if _not_modified(etag, last_modified):
+                return _with_validators(make_response("", 304), etag, last_modified)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                _with_validators(response, etag, last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,247 @@
+"""Change events pushed to clients over server-sent events (``GET /api/events``).
+
+Every committed insert/update/delete of a loan, equipment or alert made
+through the ORM becomes a compact delta such as
+``{"action": "updated", "id": 7, "status": "active", ...}``. Deltas are
+collected at flush time and handed to the broker only after the transaction
+commits, so rolled-back or retried transitions publish nothing. Bulk Core
+statements (imports, the overdue and archive jobs) are not published.
+
+The default ``LocalBroker`` fans events out to the streams of the current
+worker process. Deployments with several worker processes point
+``EVENTS_BROKER`` at a factory (``"package.module:make_broker"``, called with
+the app) returning an object with the same ``publish``/``subscribe`` methods
+backed by a shared pub/sub.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from werkzeug.utils import import_string
+
+from backend import db
+from backend.models import Alert, Equipment, Loan
+
+
+# entity name and the attributes sent with each delta
+PUBLISHED = {
+    Loan: ("loan", ("user_id", "equipment_id", "status", "start_date", "due_date", "return_date")),
+    Equipment: ("equipment", ("name", "type", "status")),
+    Alert: ("alert", ("loan_id", "alert_type", "date")),
+}
+
+
+class Subscription:
+    """One client's queue of events; a client that falls behind is told to resync."""
+
+    def __init__(self, broker, maxsize: int):
+        self.broker = broker
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+        # events published before subscribing that the client has not seen
+        self.backlog = []
+        # the client's Last-Event-ID is unknown here (other process, or too old)
+        self.missed = False
+        # broker position when ``missed`` was found, sent with the resync
+        self.resync_id = None
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float):
+        """The next event, or None after ``timeout`` seconds without one."""
+        if self.backlog:
+            return self.backlog.pop(0)
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Thread-safe in-process fan-out, keeping the last ``replay`` events for reconnects.
+
+    Event ids are ``<process token>-<sequence>``, so a ``Last-Event-ID`` issued
+    by another process (or before a restart) is recognised as unknown.
+    """
+
+    def __init__(self, queue_size: int = 256, replay: int = 1000):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._recent = deque(maxlen=replay)
+        self._token = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+        self._last_sequence = 0
+
+    def publish(self, events):
+        with self._lock:
+            for item in events:
+                self._last_sequence = next(self._sequence)
+                item = {**item, "id": f"{self._token}-{self._last_sequence}"}
+                self._recent.append(item)
+                for subscription in self._subscribers:
+                    subscription.put(item)
+
+    def current_id(self) -> str:
+        """The id of the last event published, for resyncs (``<token>-0`` before any)."""
+        with self._lock:
+            return self._current_id()
+
+    def _current_id(self) -> str:
+        return f"{self._token}-{self._last_sequence}"
+
+    def _replay_after(self, last_event_id):
+        token, _, sequence = last_event_id.partition("-")
+        if token != self._token or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if self._recent and _sequence_of(self._recent[0]) > sequence + 1:
+            return None  # older than the replay window
+        return [item for item in self._recent if _sequence_of(item) > sequence]
+
+    def subscribe(self, last_event_id: str = None) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            if last_event_id:
+                backlog = self._replay_after(last_event_id)
+                subscription.missed = backlog is None
+                if subscription.missed:
+                    subscription.resync_id = self._current_id()
+                subscription.backlog = backlog or []
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def _sequence_of(item) -> int:
+    return int(item["id"].rsplit("-", 1)[1])
+
+
+def init_events(app):
+    if not app.config.get("EVENTS_ENABLED", True):
+        return
+    factory = app.config.get("EVENTS_BROKER")
+    if factory:
+        broker = import_string(factory)(app)
+    else:
+        broker = LocalBroker(app.config["EVENTS_QUEUE_SIZE"], app.config["EVENTS_REPLAY_SIZE"])
+    app.extensions["events"] = broker
+
+
+def get_broker():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("events")
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _delta(obj, action: str):
+    entity, attributes = PUBLISHED[type(obj)]
+    payload = {"action": action, "id": obj.id}
+    if action != "deleted":
+        payload.update((name, _value(getattr(obj, name))) for name in attributes)
+    elif entity == "loan":
+        # routing needs the owner even for deletions
+        payload["user_id"] = obj.user_id
+    return {"entity": entity, "data": payload}
+
+
+def visible_to(item, user) -> bool:
+    """Equipments go to everyone, alerts to staff, loans to admins and their borrower."""
+    entity = item["entity"]
+    if entity == "equipment" or user.role == "admin":
+        return True
+    if entity == "alert":
+        return user.role == "teacher"
+    return item["data"].get("user_id") == user.id
+
+
+def format_event(item) -> str:
+    data = json.dumps(item["data"], separators=(",", ":"))
+    return f"id: {item['id']}\nevent: {item['entity']}\ndata: {data}\n\n"
+
+
+def format_resync(event_id: str) -> str:
+    # the id moves the client's Last-Event-ID past what it missed, so its
+    # reconnect replays from here instead of getting another resync
+    return f"id: {event_id}\nevent: resync\ndata: {{}}\n\n"
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_after_flush(session, flush_context):
+    if get_broker() is None:
+        return
+    pending = session.info.setdefault("pending_events", [])
+    for obj in session.new:
+        if type(obj) in PUBLISHED:
+            pending.append(_delta(obj, "created"))
+    for obj in session.dirty:
+        if type(obj) in PUBLISHED and session.is_modified(obj, include_collections=False):
+            pending.append(_delta(obj, "updated"))
+    for obj in session.deleted:
+        if type(obj) in PUBLISHED:
+            pending.append(_delta(obj, "deleted"))
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish_after_commit(session):
+    pending = session.info.pop("pending_events", None)
+    broker = get_broker()
+    if pending and broker is not None:
+        broker.publish(pending)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _discard_unpublished(session, transaction):
+    # rolled back (or closed without commit): drop what was collected
+    if transaction.parent is None:
+        session.info.pop("pending_events", None)
+
+
+def event_stream(subscription, user, heartbeat: float, max_seconds: float, retry_ms: int):
+    """SSE text for ``user``: matching events, a comment every ``heartbeat`` seconds.
+
+    Ends after ``max_seconds`` (the browser reconnects after ``retry_ms`` with
+    ``Last-Event-ID``) or with a ``resync`` event when the client fell behind
+    or missed events, after which it should reload its lists.
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        if subscription.missed:
+            yield format_resync(subscription.resync_id)
+            return
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            item = subscription.get(timeout=heartbeat)
+            if subscription.overflowed:
+                yield format_resync(subscription.broker.current_id())
+                return
+            if item is None:
+                yield ": ping\n\n"
+            elif visible_to(item, user):
+                yield format_event(item)
+    finally:
+        subscription.close()
@@ -0,0 +1,199 @@
+"""Per-request timing, SQL and status metrics, exposed in Prometheus text format.
+
+``init_metrics(app)`` times every request and, through SQLAlchemy engine
+events, counts the queries it ran and the time spent in them. The numbers
+are aggregated per route rule (``/api/loans/<int:loan_id>``, not per URL) in
+an in-process registry that ``GET /api/metrics`` renders; each worker process
+reports its own numbers, so scrape every worker (or sum them) as usual.
+
+Requests slower than ``SLOW_REQUEST_MS`` are logged with the SQL they ran,
+which is what makes an N+1 serialization stand out. Rows a streamed response
+fetches after the view returns are not included in its numbers.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+# SQL statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 50
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """Thread-safe registry of per-route request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)  # (method, route, status) -> count
+            self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+            self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+            self.db_seconds = defaultdict(float)
+            self.response_bytes = defaultdict(int)
+
+    def observe(self, method, route, status, seconds, query_count, db_seconds, size):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, str(status))] += 1
+            self.latency[key].observe(seconds)
+            self.queries[key].observe(query_count)
+            self.db_seconds[key] += db_seconds
+            if size is not None:
+                self.response_bytes[key] += size
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            _counter(lines, "http_requests_total", "Requests handled, by route and status.",
+                     (((m, r, s), v) for (m, r, s), v in self.requests.items()),
+                     ("method", "route", "status"))
+            _histogram(lines, "http_request_duration_seconds", "Request handling time.", self.latency)
+            _histogram(lines, "http_request_db_queries", "SQL statements executed per request.", self.queries)
+            _counter(lines, "http_request_db_seconds_total", "Time spent in SQL statements.",
+                     self.db_seconds.items(), ("method", "route"))
+            _counter(lines, "http_response_size_bytes_total", "Response body bytes (non-streamed responses).",
+                     self.response_bytes.items(), ("method", "route"))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value) -> str:
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _counter(lines, name, help_text, items, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for values, value in sorted(items):
+        lines.append(f"{name}{_labels(label_names, values)} {_number(value)}")
+
+
+def _histogram(lines, name, help_text, histograms):
+    names = ("method", "route")
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, hist in sorted(histograms.items()):
+        for bound, total in hist.cumulative():
+            lines.append(f"{name}_bucket{_labels(names, key, [('le', bound)])} {total}")
+        lines.append(f"{name}_bucket{_labels(names, key, [('le', '+Inf')])} {hist.count}")
+        lines.append(f"{name}_sum{_labels(names, key)} {_number(hist.sum)}")
+        lines.append(f"{name}_count{_labels(names, key)} {hist.count}")
+
+
+registry = RequestMetrics()
+
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if not has_request_context() or "metrics_start" not in g:
+        return
+    g.metrics_queries += 1
+    g.metrics_db_seconds += elapsed
+    if g.metrics_statements is not None and len(g.metrics_statements) < MAX_LOGGED_STATEMENTS:
+        g.metrics_statements.append((elapsed, statement))
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_query_start"):
+        conn.info["metrics_query_start"].pop()
+
+
+def _install_engine_listeners():
+    # Listening on the Engine class covers every engine (and app) in the process.
+    global _listeners_installed
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listeners_installed = True
+
+
+def init_metrics(app):
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    _install_engine_listeners()
+    slow_ms = app.config.get("SLOW_REQUEST_MS", 0)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_seconds = 0.0
+        g.metrics_statements = [] if slow_ms > 0 else None
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        size = None if response.is_streamed else response.calculate_content_length()
+        registry.observe(
+            request.method, route, response.status_code,
+            elapsed, g.metrics_queries, g.metrics_db_seconds, size,
+        )
+        if slow_ms > 0 and elapsed * 1000 >= slow_ms:
+            statements = "".join(
+                f"\n  {seconds * 1000:8.2f} ms  {' '.join(sql.split())}"
+                for seconds, sql in g.metrics_statements
+            )
+            app.logger.warning(
+                "slow request %s %s -> %s in %.1f ms, %d queries (%.1f ms in DB)%s",
+                request.method, request.full_path.rstrip("?"), response.status_code,
+                elapsed * 1000, g.metrics_queries, g.metrics_db_seconds * 1000, statements,
+            )
+        return response
@@ -0,0 +1,91 @@
+"""EXPLAIN the hot list/filter queries and report any that fall back to a full table scan.
+
+Used by ``flask check-indexes`` so a missing or dropped index shows up as a
+failing command (e.g. in CI against a freshly migrated SQLite/MySQL database)
+rather than as a slow page in production.
+"""
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from backend import db
+from backend.models import Loan
+from backend.utils.pagination import page_query
+
+
+def hot_queries():
+    """The statements of the hot list/filter endpoints and jobs, built by the functions that run them."""
+    from flask import current_app
+
+    from backend.controllers.equipment_controller import EQUIPMENT_ORDER, filtered_equipments
+    from backend.controllers.loan_controller import LOAN_ORDER, _filtered_loans
+    from backend.controllers.report_controller import report_query
+    from backend.controllers.reservation_controller import availability_query, conflict_query
+    from backend.controllers.stats_controller import recent_pending_query
+    from backend.jobs.loan_rollups import _activity
+    from backend.jobs.overdue_alerts import _alerts_to_insert, _due_before
+    from backend.routes.alert_routes import ALERT_ORDER, filtered_alerts
+
+    now, page = datetime(2000, 1, 1), {"limit": "50"}
+    loan_duration = timedelta(days=current_app.config.get("LOAN_DURATION_DAYS", 7))
+    start, end = datetime(2000, 1, 1), datetime(2000, 1, 8)
+    loan_started, loan_returned = _activity(Loan, start, end, db.engine.dialect.name)
+    return {
+        "loans of a user (/loans/me)": page_query(_filtered_loans({}, owner_id=1), LOAN_ORDER, page, descending=True),
+        "loans by status (status filter)": page_query(
+            _filtered_loans({"status": "pending"}), LOAN_ORDER, page, descending=True
+        ),
+        "pending loans (stats)": recent_pending_query(5),
+        "loans of an equipment": page_query(
+            _filtered_loans({"equipment_id": "1"}), LOAN_ORDER, page, descending=True
+        ),
+        "loans page (admin listing)": page_query(_filtered_loans({}), LOAN_ORDER, page, descending=True),
+        "active loans by due date (overdue job)": _alerts_to_insert(
+            "overdue", now, _due_before(now, loan_duration), ["overdue"]
+        ),
+        "booking conflicts": conflict_query(1, start, end).limit(1),
+        "availability (bookings of equipments)": availability_query([1, 2, 3], start, end),
+        "loans started in a range (daily rollups)": loan_started,
+        "loans returned in a range (daily rollups)": loan_returned,
+        "report rows of a range": report_query(date(2000, 1, 1), date(2001, 1, 1)),
+        "equipments by status": page_query(filtered_equipments({"status": "available"}), EQUIPMENT_ORDER, page),
+        "alerts page": page_query(filtered_alerts({}), ALERT_ORDER, page, descending=True),
+        "alerts of a loan": page_query(filtered_alerts({"loan_id": "1"}), ALERT_ORDER, page, descending=True),
+    }
+
+
+def _compile(query):
+    # ORM queries and Core selects
+    statement = getattr(query, "statement", query)
+    return str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _sqlite_full_scans(sql):
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    plan = [row[-1] for row in rows]
+    # "SCAN loans" without "USING ... INDEX" reads every row of the table.
+    scans = [line for line in plan if re.match(r"^SCAN \w+( AS \w+)?$", line)]
+    return scans, plan
+
+
+def _mysql_full_scans(sql):
+    result = db.session.execute(text(f"EXPLAIN {sql}"))
+    columns = list(result.keys())
+    rows = [dict(zip(columns, row)) for row in result]
+    scans = [f"{r['table']}: type=ALL" for r in rows if r.get("type") == "ALL"]
+    plan = [f"{r['table']}: type={r.get('type')} key={r.get('key')}" for r in rows]
+    return scans, plan
+
+
+def find_full_scans():
+    """Return ``{name: (full_scan_lines, plan_lines)}`` for every hot query."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        explain = _sqlite_full_scans
+    elif dialect in {"mysql", "mariadb"}:
+        explain = _mysql_full_scans
+    else:
+        raise RuntimeError(f"EXPLAIN check not supported for {dialect}")
+
+    return {name: explain(_compile(query)) for name, query in hot_queries().items()}
@@ -0,0 +1,41 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """In-process token buckets keyed by an arbitrary string (email, IP, ...).
+
+    Each key starts with ``capacity`` tokens and regains ``refill_per_second``
+    tokens per second. Only the ``max_keys`` most recently used keys are kept,
+    so a flood of distinct keys cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, capacity: float, refill_per_second: float):
+        """Take one token for ``key``; returns ``(allowed, retry_after_seconds)``."""
+        if capacity <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                allowed, retry_after = True, 0
+                tokens -= 1
+            else:
+                allowed = False
+                retry_after = (1 - tokens) / refill_per_second if refill_per_second > 0 else None
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
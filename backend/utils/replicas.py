@@ -0,0 +1,65 @@
+"""Send the reads of GET requests to read replicas.
+
+Each URI of ``READ_REPLICA_URIS`` becomes a ``replica_<n>`` bind (an engine
+with the same pool options as the primary). For GET/HEAD requests to the
+blueprints listed in ``READ_REPLICA_BLUEPRINTS``, ``RoutingSession`` runs
+the statements on one replica, picked once per session. The decision is
+made per statement from the request context, so streamed responses (whose
+generator gets a fresh session) read from a replica too. The primary still
+gets:
+
+* writes (flushes, ``insert``/``update``/``delete`` statements) and locking
+  reads (``FOR UPDATE``); after the first one, every later statement of the
+  request stays on the primary as well, so the request reads its own writes;
+* everything else: other methods and blueprints, CLI commands and jobs.
+
+This module must not import ``backend``: ``db`` is created with its session class.
+"""
+import random
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+
+REPLICA_BIND_PREFIX = "replica_"
+READ_METHODS = {"GET", "HEAD"}
+
+
+def replica_binds(uris) -> dict:
+    return {f"{REPLICA_BIND_PREFIX}{i}": uri for i, uri in enumerate(uris)}
+
+
+def _is_replica_read() -> bool:
+    return (
+        has_request_context()
+        and request.method in READ_METHODS
+        and request.blueprint in current_app.config["READ_REPLICA_BLUEPRINTS"]
+    )
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self.info.get("pinned_to_primary") and _is_replica_read():
+            if isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None:
+                self.info["pinned_to_primary"] = True
+            else:
+                replica = self._replica()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        engines = self._db.engines
+        if "replica_key" not in self.info:
+            keys = [name for name in engines if name and name.startswith(REPLICA_BIND_PREFIX)]
+            self.info["replica_key"] = random.choice(keys) if keys else None
+        key = self.info["replica_key"]
+        return engines[key] if key else None
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _pin_before_flush(session, flush_context, instances):
+    session.info["pinned_to_primary"] = True
+
@@ -0,0 +1,249 @@
+"""Full-text search index over users, equipments and loans.
+
+Documents live in one shadow table, ``search_index``: an FTS5 virtual table
+on SQLite and an InnoDB table with a FULLTEXT index on MySQL. Each document
+is keyed by ``ref_id * 4 + kind code``, so a row is replaced or removed with
+a primary-key lookup. The text is built in SQL from the source tables (a
+loan's text is its user's name/email plus the equipment name).
+
+The index is kept in sync from session events in the same transaction as the
+write: inserted/deleted rows, and updates to the indexed columns, re-run
+``INSERT ... SELECT`` for the affected ids (renaming a user or equipment also
+refreshes their loans). Bulk ``INSERT`` statements bypass the ORM, so bulk
+importers call ``index_new_rows`` after each batch; ``rebuild_index`` (``flask
+search-reindex``) regenerates everything.
+
+Other databases have no index; callers fall back to ``LIKE`` filters.
+"""
+import re
+
+from flask import current_app
+from sqlalchemy import column, delete, event, func, inspect, literal, literal_column, select, table
+from sqlalchemy.dialects.mysql import match as mysql_match
+
+from backend import db
+from backend.models import Equipment, Loan, User
+from backend.utils.pagination import apply_search
+
+
+KIND_CODES = {"users": 1, "equipments": 2, "loans": 3}
+KIND_MODELS = {"users": User, "equipments": Equipment, "loans": Loan}
+# Attributes whose change alters a document
+INDEXED_ATTRIBUTES = {
+    "users": ("name", "email"),
+    "equipments": ("name", "type", "description"),
+    "loans": ("user_id", "equipment_id"),
+}
+MAX_TERMS = 8
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "body, kind UNINDEXED, ref_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+_MYSQL_DDL = (
+    "CREATE TABLE IF NOT EXISTS search_index ("
+    "id BIGINT NOT NULL PRIMARY KEY, "
+    "kind VARCHAR(20) NOT NULL, "
+    "ref_id INTEGER NOT NULL, "
+    "body TEXT NOT NULL, "
+    "FULLTEXT KEY ft_search_index_body (body)"
+    ") ENGINE=InnoDB"
+)
+SEARCH_INDEX_DDL = {"sqlite": _SQLITE_DDL, "mysql": _MYSQL_DDL}
+
+
+def _key_name(dialect_name: str) -> str:
+    # FTS5 tables only have the implicit rowid as an integer key
+    return "rowid" if dialect_name == "sqlite" else "id"
+
+
+def _index_table(dialect_name: str):
+    return table(
+        "search_index",
+        column(_key_name(dialect_name)),
+        column("kind"),
+        column("ref_id"),
+        column("body"),
+    )
+
+
+def supported(bind=None) -> bool:
+    bind = bind or db.session.get_bind()
+    return bind.dialect.name in SEARCH_INDEX_DDL and current_app.config.get("SEARCH_INDEX_ENABLED", True)
+
+
+def _words(*columns):
+    body = func.coalesce(columns[0], "")
+    for col in columns[1:]:
+        body = body + " " + func.coalesce(col, "")
+    return body
+
+
+def _documents(kind: str):
+    """SELECT (key, kind, ref_id, body) for every document of ``kind``; filter with ``.where``."""
+    code = KIND_CODES[kind]
+    if kind == "users":
+        return select(User.id * 4 + code, literal(kind), User.id, _words(User.name, User.email))
+    if kind == "equipments":
+        return select(
+            Equipment.id * 4 + code,
+            literal(kind),
+            Equipment.id,
+            _words(Equipment.name, Equipment.type, Equipment.description),
+        )
+    return (
+        select(Loan.id * 4 + code, literal(kind), Loan.id, _words(User.name, User.email, Equipment.name))
+        .select_from(Loan)
+        .outerjoin(User, User.id == Loan.user_id)
+        .outerjoin(Equipment, Equipment.id == Loan.equipment_id)
+    )
+
+
+def _keys(kind: str, ids_clause):
+    model = KIND_MODELS[kind]
+    return select(model.id * 4 + KIND_CODES[kind]).where(ids_clause)
+
+
+def _reindex(connection, kind: str, ids_clause):
+    """Replace the documents of ``kind`` whose source rows match ``ids_clause``."""
+    index = _index_table(connection.dialect.name)
+    key = index.c[_key_name(connection.dialect.name)]
+    connection.execute(delete(index).where(key.in_(_keys(kind, ids_clause))))
+    connection.execute(
+        index.insert().from_select([key.name, "kind", "ref_id", "body"], _documents(kind).where(ids_clause))
+    )
+
+
+def _remove(connection, kind: str, ids):
+    index = _index_table(connection.dialect.name)
+    key = index.c[_key_name(connection.dialect.name)]
+    connection.execute(delete(index).where(key.in_([i * 4 + KIND_CODES[kind] for i in ids])))
+
+
+def index_rows(connection, changed: dict, removed: dict):
+    """Refresh documents for ``{kind: ids}`` that changed and drop those ``removed``."""
+    for kind, ids in removed.items():
+        if ids:
+            _remove(connection, kind, sorted(ids))
+    for kind, ids in changed.items():
+        if not ids:
+            continue
+        ids = sorted(ids)
+        _reindex(connection, kind, KIND_MODELS[kind].id.in_(ids))
+        # loans embed their user's and equipment's names
+        if kind == "users":
+            _reindex(connection, "loans", Loan.user_id.in_(ids))
+        elif kind == "equipments":
+            _reindex(connection, "loans", Loan.equipment_id.in_(ids))
+
+
+def index_new_rows(model, after_id: int):
+    """Index rows of ``model`` with ids above ``after_id`` (after a bulk INSERT)."""
+    if not supported():
+        return
+    kind = model.__tablename__
+    _reindex(db.session.connection(), kind, model.id > after_id)
+
+
+def rebuild_index() -> dict:
+    """Drop and regenerate every document; returns documents per kind."""
+    connection = db.session.connection()
+    index = _index_table(connection.dialect.name)
+    key = index.c[_key_name(connection.dialect.name)]
+    connection.execute(delete(index))
+    counts = {}
+    for kind in KIND_CODES:
+        result = connection.execute(
+            index.insert().from_select([key.name, "kind", "ref_id", "body"], _documents(kind))
+        )
+        counts[kind] = result.rowcount
+    db.session.commit()
+    return counts
+
+
+def match_expression(term: str, dialect_name: str):
+    """Prefix-match every word of ``term`` (AND); None when it has no words."""
+    words = re.findall(r"\w+", (term or "").lower())[:MAX_TERMS]
+    if not words:
+        return None
+    if dialect_name == "sqlite":
+        return " ".join(f'"{w}"*' for w in words)
+    return " ".join(f"+{w}*" for w in words)
+
+
+def matches(kind: str, term: str, within=None, limit: int = None):
+    """SELECT (ref_id, score) of ``kind`` documents matching ``term``, best first.
+
+    ``within`` is an optional subquery of allowed ids. Returns None when the
+    term has no searchable words.
+    """
+    dialect_name = db.session.get_bind().dialect.name
+    expression = match_expression(term, dialect_name)
+    if expression is None:
+        return None
+    index = _index_table(dialect_name)
+    if dialect_name == "sqlite":
+        score = literal_column("bm25(search_index)")
+        query = select(index.c.ref_id, score.label("score")).where(index.c.body.op("MATCH")(expression))
+        query = query.order_by(score)
+    else:
+        relevance = mysql_match(index.c.body, against=expression).in_boolean_mode()
+        query = select(index.c.ref_id, relevance.label("score")).where(relevance)
+        query = query.order_by(relevance.desc())
+    query = query.where(index.c.kind == kind)
+    if within is not None:
+        query = query.where(index.c.ref_id.in_(within))
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def filter_by_search(query, kind: str, args, *fallback_columns, name: str = "q"):
+    """List filter for ``?q=``: the full-text index when available, else ``LIKE``."""
+    term = (args.get(name) or "").strip()
+    if not term:
+        return query
+    if not supported():
+        return apply_search(query, args, *fallback_columns, name=name)
+    ids = matches(kind, term)
+    if ids is None:
+        return query
+    return query.filter(KIND_MODELS[kind].id.in_(select(ids.subquery().c.ref_id)))
+
+
+def _changed_attributes(obj, names):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(db.session, "after_flush")
+def _sync_after_flush(session, flush_context):
+    if not supported(session.get_bind()):
+        return
+    kinds = {model: kind for kind, model in KIND_MODELS.items()}
+    changed = {kind: set() for kind in KIND_MODELS}
+    removed = {kind: set() for kind in KIND_MODELS}
+    for obj in session.new:
+        kind = kinds.get(type(obj))
+        if kind:
+            changed[kind].add(obj.id)
+    for obj in session.dirty:
+        kind = kinds.get(type(obj))
+        if kind and _changed_attributes(obj, INDEXED_ATTRIBUTES[kind]):
+            changed[kind].add(obj.id)
+    for obj in session.deleted:
+        kind = kinds.get(type(obj))
+        if kind:
+            removed[kind].add(obj.id)
+    if any(changed.values()) or any(removed.values()):
+        index_rows(session.connection(), changed, removed)
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    # create_all() databases (tests, benchmarks) get the index too; migrated
+    # ones get it from revision 0006
+    ddl = SEARCH_INDEX_DDL.get(connection.dialect.name)
+    if ddl:
+        connection.exec_driver_sql(ddl)
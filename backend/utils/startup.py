@@ -0,0 +1,37 @@
+"""Configuration sanity checks logged once when the app is created."""
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_SECRET_KEY = "dev-secret-key-change-me"
+
+
+def check_pool_capacity(app, engine):
+    """Warn when a worker's request threads can outnumber its pooled DB connections.
+
+    Every request (and every streamed response until it finishes) holds a
+    connection, so with fewer connections than threads the extra requests
+    wait up to ``pool_timeout`` and then fail.
+    """
+    pool = engine.pool
+    threads = app.config.get("WEB_THREADS", 1)
+    if not isinstance(pool, QueuePool):
+        return
+    size, overflow = pool.size(), max(pool._max_overflow, 0)
+    if size + overflow < threads:
+        app.logger.warning(
+            "DB pool (pool_size=%d + max_overflow=%d) is smaller than WEB_THREADS=%d: "
+            "requests will wait for connections and time out under load; raise DB_POOL_SIZE",
+            size, overflow, threads,
+        )
+    elif size < threads:
+        app.logger.warning(
+            "DB pool_size=%d is smaller than WEB_THREADS=%d: busy periods will open and "
+            "close overflow connections; consider DB_POOL_SIZE=%d",
+            size, threads, threads,
+        )
+
+
+def check_production_settings(app):
+    if app.debug or app.testing:
+        return
+    if app.config.get("SECRET_KEY") == DEFAULT_SECRET_KEY:
+        app.logger.warning("SECRET_KEY is the development default; set SECRET_KEY in the environment")
@@ -0,0 +1,98 @@
+"""Incremental JSON/NDJSON responses for unbounded list endpoints.
+
+A full (unpaginated) listing is returned by the controllers as a
+``RowStream`` placed in the body instead of a list. ``list_response`` then
+writes the body piece by piece while iterating the query with ``yield_per``,
+so memory per request stays flat and the first byte goes out before the last
+row is read. Paginated bodies are ordinary dicts and go through ``jsonify``.
+"""
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+from backend import db
+
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Rows serialized per chunk handed to the WSGI server
+CHUNK_ROWS = 200
+
+
+class RowStream:
+    """A query plus the function that turns each row into a dict."""
+
+    def __init__(self, query, serialize):
+        self.query = query
+        self.serialize = serialize
+
+    def __iter__(self):
+        # The view's session is closed at teardown before streaming starts;
+        # rebind the query to the session that is current while iterating.
+        query = self.query.with_session(db.session())
+        for row in query.yield_per(current_app.config["STREAM_BATCH_SIZE"]):
+            yield self.serialize(row)
+
+
+def wants_ndjson() -> bool:
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _compact_dumps():
+    # the app's JSON provider (dates, sort_keys) with jsonify's compact separators
+    dumps = current_app.json.dumps
+    return lambda value: dumps(value, separators=(",", ":"))
+
+
+def _json_body(body: dict, key: str):
+    dumps = _compact_dumps()
+    rest = {k: v for k, v in body.items() if k != key}
+
+    yield f"{{{dumps(key)}:["
+    first = True
+    for record in body[key]:
+        yield dumps(record) if first else "," + dumps(record)
+        first = False
+    yield "]"
+    for k, v in rest.items():
+        yield f",{dumps(k)}:{dumps(v)}"
+    yield "}\n"
+
+
+def _ndjson_body(body: dict, key: str):
+    dumps = _compact_dumps()
+    for record in body[key]:
+        yield dumps(record) + "\n"
+
+
+def list_response(body, status_code: int):
+    """``jsonify`` a controller result, streaming it if it holds a ``RowStream``.
+
+    With NDJSON requested the rows are written one object per line; a page's
+    ``next_cursor`` then travels in the ``X-Next-Cursor`` header.
+    """
+    if status_code != 200:
+        return jsonify(body), status_code
+
+    stream_key = next((k for k, v in body.items() if isinstance(v, RowStream)), None)
+    if wants_ndjson():
+        key = stream_key or next(k for k, v in body.items() if isinstance(v, list))
+        response = Response(stream_with_context(_chunked(_ndjson_body(body, key))), mimetype=NDJSON_MIMETYPE)
+        if body.get("next_cursor"):
+            response.headers["X-Next-Cursor"] = body["next_cursor"]
+        return response, status_code
+
+    if stream_key is None:
+        return jsonify(body), status_code
+    generator = _chunked(_json_body(body, stream_key))
+    return Response(stream_with_context(generator), mimetype="application/json"), status_code
@@ -0,0 +1,77 @@
+"""Helpers for state transitions that must stay correct under concurrent workers.
+
+Rows that take part in loan/equipment transitions carry a ``version`` column
+(SQLAlchemy ``version_id_col``), so every UPDATE is a compare-and-swap
+``... WHERE id = ? AND version = ?``. Loads inside a transition additionally
+use ``SELECT ... FOR UPDATE`` where the database supports it (MySQL), which
+makes competing transactions wait instead of fail. If a write still loses the
+race, the whole controller function is rolled back and re-run so it re-reads
+the winner's state and answers accordingly.
+"""
+from functools import wraps
+
+from flask import abort, current_app
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend import db
+
+
+# MySQL: 1205 lock wait timeout, 1213 deadlock
+_RETRYABLE_MYSQL_ERRORS = {1205, 1213}
+
+
+def _is_retryable(exc) -> bool:
+    if isinstance(exc, StaleDataError):
+        return True
+    orig = getattr(exc, "orig", None)
+    code = orig.args[0] if orig is not None and orig.args else None
+    if code in _RETRYABLE_MYSQL_ERRORS:
+        return True
+    return "database is locked" in str(orig)
+
+
+def enable_sqlite_transactions(engine):
+    """Make pysqlite run reads and writes in one real transaction.
+
+    By default the driver only issues BEGIN before the first write, so the
+    SELECT that checked a row's state runs outside the transaction. SQLite has
+    no ``FOR UPDATE``; with an explicit BEGIN the check-then-write sequence is
+    atomic and a competing writer fails with "database is locked" (retried by
+    ``retry_on_conflict``) instead of silently overwriting.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+def get_for_update_or_404(model, ident):
+    """Load ``model`` by primary key with a row lock, fresh from the database."""
+    instance = db.session.get(model, ident, with_for_update=True, populate_existing=True)
+    if instance is None:
+        abort(404)
+    return instance
+
+
+def retry_on_conflict(f):
+    """Re-run a committing controller function when it loses a concurrent update."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        attempts = current_app.config["TRANSACTION_RETRIES"] + 1
+        for _ in range(attempts):
+            try:
+                return f(*args, **kwargs)
+            except (StaleDataError, OperationalError) as exc:
+                db.session.rollback()
+                if not _is_retryable(exc):
+                    raise
+        return {"message": "The resource was modified concurrently, please retry"}, 409
+
+    return wrapper
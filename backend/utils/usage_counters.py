@@ -0,0 +1,188 @@
+"""Per-user and per-equipment loan counters (``user_loan_stats``, ``equipment_usage_stats``).
+
+The loan transitions call ``record_loan_started`` / ``record_loan_returned`` /
+``record_loan_removed``, which upsert the affected counter rows with
+relative updates (``x = x + 1``) on the session's connection, in the same
+transaction as the transition: a rolled-back transition leaves no trace and
+concurrent transitions never overwrite each other's increments.
+
+``reconcile_counters`` recomputes the rows in bulk from ``loans`` and
+``loans_archive`` (``flask reconcile-counters``); bulk imports use it for
+the users and equipments they touched.
+"""
+from sqlalchemy import case, delete, func, insert, literal, literal_column, or_, select, union_all, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend import db
+from backend.models import ArchivedLoan, EquipmentUsageStats, Loan, UserLoanStats
+
+
+# loans that were handed out: the ones the counters describe
+HANDED_OUT_STATUSES = ("active", "returned")
+
+_USERS = UserLoanStats.__table__
+_EQUIPMENTS = EquipmentUsageStats.__table__
+
+
+def _add(current, new):
+    return current + new
+
+
+def _latest(current, new):
+    return case((or_(current.is_(None), new > current), new), else_=current)
+
+
+def _upsert(table, key_name: str, key, changes: dict):
+    """Create the row for ``key`` from ``changes`` or fold them into the existing one.
+
+    ``changes`` maps column -> ``(value, combine)``, where ``combine(current,
+    new)`` is the SQL expression for the updated column.
+    """
+    connection = db.session.connection()
+    values = {name: value for name, (value, _) in changes.items()}
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(table).values({key_name: key, **values})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key_name],
+            set_={name: combine(table.c[name], stmt.excluded[name]) for name, (_, combine) in changes.items()},
+        )
+        connection.execute(stmt)
+    elif dialect == "mysql":
+        stmt = mysql_insert(table).values({key_name: key, **values})
+        stmt = stmt.on_duplicate_key_update(
+            {name: combine(table.c[name], stmt.inserted[name]) for name, (_, combine) in changes.items()}
+        )
+        connection.execute(stmt)
+    else:
+        result = connection.execute(
+            update(table)
+            .where(table.c[key_name] == key)
+            .values({
+                name: combine(table.c[name], literal(value, table.c[name].type))
+                for name, (value, combine) in changes.items()
+            })
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values({key_name: key, **values}))
+
+
+def lock_active_loan_count(user_id) -> int:
+    """The user's active loans from the counter row, locked until the transaction ends.
+
+    A zero row is upserted first, so even a user's first loan has a row to
+    lock: two transitions checking the same user's limit run one after the
+    other, and the second sees the first one's increment.
+    """
+    _upsert(_USERS, "user_id", user_id, {"active_loans": (0, _add)})
+    connection = db.session.connection()
+    return connection.execute(
+        select(_USERS.c.active_loans).where(_USERS.c.user_id == user_id).with_for_update()
+    ).scalar()
+
+
+def _loaned_hours(loan) -> float:
+    start = loan.start_date or loan.loan_date
+    if not (start and loan.return_date):
+        return 0.0
+    return max((loan.return_date - start).total_seconds(), 0) / 3600
+
+
+def record_loan_started(loan):
+    """``loan`` became active (created active, approved, or reservation handed out)."""
+    _upsert(_USERS, "user_id", loan.user_id, {
+        "active_loans": (1, _add),
+        "total_loans": (1, _add),
+        "last_loan_at": (loan.loan_date, _latest),
+    })
+    _upsert(_EQUIPMENTS, "equipment_id", loan.equipment_id, {"loan_count": (1, _add)})
+
+
+def record_loan_returned(loan):
+    _upsert(_USERS, "user_id", loan.user_id, {"active_loans": (-1, _add)})
+    _upsert(_EQUIPMENTS, "equipment_id", loan.equipment_id, {"total_loaned_hours": (_loaned_hours(loan), _add)})
+
+
+def record_loan_removed(loan):
+    """``loan`` is being deleted; ``last_loan_at`` is left for the next reconcile."""
+    if loan.status not in HANDED_OUT_STATUSES:
+        return
+    active = 1 if loan.status == "active" else 0
+    _upsert(_USERS, "user_id", loan.user_id, {"active_loans": (-active, _add), "total_loans": (-1, _add)})
+    _upsert(_EQUIPMENTS, "equipment_id", loan.equipment_id, {
+        "loan_count": (-1, _add),
+        "total_loaned_hours": (-_loaned_hours(loan), _add),
+    })
+
+
+def hours_between(start, end, dialect: str):
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 24
+    if dialect == "mysql":
+        return func.timestampdiff(literal_column("SECOND"), start, end) / 3600.0
+    return func.extract("epoch", end - start) / 3600.0
+
+
+def _handed_out_loans(column: str, ids):
+    selects = []
+    for model in (Loan, ArchivedLoan):
+        query = select(
+            model.user_id,
+            model.equipment_id,
+            model.status,
+            model.loan_date,
+            func.coalesce(model.start_date, model.loan_date).label("start_date"),
+            model.return_date,
+        ).where(model.status.in_(HANDED_OUT_STATUSES))
+        if ids is not None:
+            query = query.where(getattr(model, column).in_(ids))
+        selects.append(query)
+    return union_all(*selects).subquery()
+
+
+def reconcile_counters(user_ids=None, equipment_ids=None) -> dict:
+    """Recompute the counter rows (all, or only the given ids) with two INSERT ... SELECTs.
+
+    Runs in the caller's transaction; returns the number of rows written per table.
+    """
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    counts = {}
+
+    if user_ids is None or user_ids:
+        loans = _handed_out_loans("user_id", user_ids)
+        stale = delete(_USERS)
+        if user_ids is not None:
+            stale = stale.where(_USERS.c.user_id.in_(user_ids))
+        connection.execute(stale)
+        rows = select(
+            loans.c.user_id,
+            func.sum(case((loans.c.status == "active", 1), else_=0)),
+            func.count(),
+            func.max(loans.c.loan_date),
+        ).group_by(loans.c.user_id)
+        counts["users"] = connection.execute(
+            insert(_USERS).from_select(["user_id", "active_loans", "total_loans", "last_loan_at"], rows)
+        ).rowcount
+
+    if equipment_ids is None or equipment_ids:
+        loans = _handed_out_loans("equipment_id", equipment_ids)
+        stale = delete(_EQUIPMENTS)
+        if equipment_ids is not None:
+            stale = stale.where(_EQUIPMENTS.c.equipment_id.in_(equipment_ids))
+        connection.execute(stale)
+        hours = case(
+            (loans.c.return_date.is_not(None), hours_between(loans.c.start_date, loans.c.return_date, dialect)),
+            else_=0,
+        )
+        rows = select(
+            loans.c.equipment_id,
+            func.count(),
+            func.coalesce(func.sum(hours), 0),
+        ).group_by(loans.c.equipment_id)
+        counts["equipments"] = connection.execute(
+            insert(_EQUIPMENTS).from_select(["equipment_id", "loan_count", "total_loaned_hours"], rows)
+        ).rowcount
+
+    return counts
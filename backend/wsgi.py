@@ -0,0 +1,12 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c backend/gunicorn.conf.py backend.wsgi:app
+    waitress-serve --threads=4 --port=8000 backend.wsgi:app
+
+Uses ``ProductionConfig`` unless ``FLASK_ENV`` names another configuration.
+"""
+import os
+
+from backend import create_app
+
+app = create_app(os.getenv("FLASK_ENV", "production"))
@@ -68,29 +68,19 @@ export default function Dashboard() {
     const fetchStats = async () => {
       setLoading(true)
       try {
-        const [equipmentsRes, loansRes] = await Promise.all([
-          api.get('/equipments'),
-          api.get('/loans'),
-        ])
-
-        const allEquipments = equipmentsRes.data.equipments
-        const allLoans = loansRes.data.loans
-
-        // Calculamos todas las estadísticas que necesitamos
-        const available = allEquipments.filter(e => e.status === 'available').length
-        const active = allLoans.filter(l => l.status === 'active').length
-        const pendingList = allLoans.filter(l => l.status === 'pending')
+        // El backend agrega los conteos con GROUP BY; no hace falta
+        // descargar todas las tablas para contarlas aquí.
+        const { data } = await api.get('/stats')
 
         setStats({
-          totalEquipment: allEquipments.length,
-          availableEquipment: available,
-          activeLoans: active,
-          pendingLoans: pendingList.length,
+          totalEquipment: data.equipments.total,
+          availableEquipment: data.equipments.by_status.available || 0,
+          activeLoans: data.loans.by_status.active || 0,
+          pendingLoans: data.loans.by_status.pending || 0,
         })
 
-        // Guardamos las 5 solicitudes pendientes más recientes para la lista
-        // (Asumiendo que la API los devuelve en orden, o usamos .slice(-5).reverse() si vienen los más viejos primero)
-        setRecentPending(pendingList.slice(0, 5))
+        // Las 5 solicitudes pendientes más recientes ya vienen ordenadas
+        setRecentPending(data.recent_pending)
 
       } catch (err) {
         console.error('Failed to load stats', err)